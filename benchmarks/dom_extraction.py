@@ -0,0 +1,91 @@
+import argparse
+import json
+import time
+from selenium.webdriver.common.by import By
+from chat_bots import ChatBot, UNREAD_USER_SELECTOR, UNREAD_NAME_SELECTOR, CHAT_MESSAGE_SELECTOR
+from mock_server import MockChatServer
+from test_config import TEST_CONFIG
+
+
+class RoundTripCounter:
+    """Counts chromedriver HTTP round-trips made through a driver"""
+
+    def __init__(self, driver):
+        self.calls = 0
+        executor = driver.command_executor
+        original = executor.execute
+
+        def counted(command, params):
+            self.calls += 1
+            return original(command, params)
+
+        executor.execute = counted
+
+
+def legacy_unread_users(driver):
+    # One find for the rows, then a find and a .text call per row
+    rows = driver.find_elements(By.CSS_SELECTOR, UNREAD_USER_SELECTOR)
+    return [row.find_element(By.CSS_SELECTOR, UNREAD_NAME_SELECTOR).text for row in rows]
+
+
+def legacy_chat_messages(driver):
+    # One find for the messages, then a .text call per message
+    return [message.text.strip() for message in driver.find_elements(By.CSS_SELECTOR, CHAT_MESSAGE_SELECTOR)]
+
+
+def measure(counter, func, repeat):
+    calls_before = counter.calls
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = time.perf_counter() - start
+    return {
+        "round_trips_per_cycle": (counter.calls - calls_before) / repeat,
+        "ms_per_cycle": round(elapsed / repeat * 1000, 2)
+    }
+
+
+def run(peers, messages, repeat):
+    server = MockChatServer().start()
+    TEST_CONFIG["website_url"] = server.url
+    TEST_CONFIG["headless"] = True
+    bot = ChatBot("BenchBot", "male")
+    try:
+        bot.setup_driver()
+        if not bot.login():
+            raise RuntimeError("Benchmark bot could not log in to the mock server")
+        for i in range(peers):
+            server.inject_message(bot.username, f"Peer{i}", "hello")
+        for i in range(messages):
+            server.inject_message(bot.username, "Peer0", f"message {i}")
+
+        counter = RoundTripCounter(bot.driver)
+        bot.elements.click("notification_bell")
+        users = bot.read_unread_users()
+        results = {
+            "peers": peers,
+            "messages": messages,
+            "unread_users": {
+                "per_element": measure(counter, lambda: legacy_unread_users(bot.driver), repeat),
+                "batched": measure(counter, bot.read_unread_users, repeat)
+            }
+        }
+        users[0]["element"].click()
+        bot.read_chat_messages()
+        results["chat_messages"] = {
+            "per_element": measure(counter, lambda: legacy_chat_messages(bot.driver), repeat),
+            "batched": measure(counter, bot.read_chat_messages, repeat)
+        }
+        return results
+    finally:
+        bot.cleanup()
+        server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-element and batched DOM extraction")
+    parser.add_argument("--peers", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.peers, args.messages, args.repeat), indent=2))
@@ -0,0 +1,80 @@
+import argparse
+import json
+import time
+import psutil
+from selenium import webdriver
+from browser_pool import apply_launch_profile, build_chrome_options
+from chat_bots import ChatBot
+from page_selectors import PageElements
+from test_config import TEST_CONFIG
+
+
+def received_bytes(driver):
+    """Bytes received over the network, from Chrome's performance log since the last call"""
+    total = 0
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        if message["method"] == "Network.loadingFinished":
+            total += message["params"].get("encodedDataLength", 0)
+    return total
+
+
+def browser_rss_mb(driver):
+    """RSS of chromedriver and every Chrome process it started"""
+    root = psutil.Process(driver.service.process.pid)
+    rss = 0
+    for process in [root] + root.children(recursive=True):
+        try:
+            rss += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return rss / (1024 * 1024)
+
+
+def measure(lean, bots, settle):
+    TEST_CONFIG["launch_profile"]["lean"] = lean
+    results = []
+    for i in range(bots):
+        bot = ChatBot(f"ProfileBench{i}", "male")
+        # Always measure the full cold login
+        bot.session_store = None
+        options = build_chrome_options()
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        bot.driver = webdriver.Chrome(options=options)
+        apply_launch_profile(bot.driver)
+        bot.elements = PageElements(bot.driver)
+        try:
+            start = time.perf_counter()
+            logged_in = bot.login()
+            login_seconds = time.perf_counter() - start
+            time.sleep(settle)
+            results.append({
+                "logged_in": logged_in,
+                "login_seconds": round(login_seconds, 2),
+                "received_kb": round(received_bytes(bot.driver) / 1024, 1),
+                "rss_mb": round(browser_rss_mb(bot.driver), 1)
+            })
+        finally:
+            bot.cleanup()
+    return {
+        "lean": lean,
+        "bots": results,
+        "avg_received_kb": round(sum(r["received_kb"] for r in results) / len(results), 1),
+        "avg_rss_mb": round(sum(r["rss_mb"] for r in results) / len(results), 1),
+        "avg_login_seconds": round(sum(r["login_seconds"] for r in results) / len(results), 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare bandwidth and RSS per bot with the lean launch profile on and off")
+    parser.add_argument("--url", default=TEST_CONFIG["website_url"])
+    parser.add_argument("--bots", type=int, default=3, help="Bots measured per profile, one at a time")
+    parser.add_argument("--settle", type=float, default=10, help="Seconds in the chat room before measuring")
+    args = parser.parse_args()
+
+    TEST_CONFIG["website_url"] = args.url
+    TEST_CONFIG["headless"] = True
+    print(json.dumps({
+        "default": measure(False, args.bots, args.settle),
+        "lean": measure(True, args.bots, args.settle)
+    }, indent=2))
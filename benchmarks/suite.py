@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import psutil
+import profiling
+import traces
+from chat_bots import BotManager, default_roster
+from clock import AcceleratedClock, RealClock
+from mock_server import MockChatServer, TrafficGenerator
+from test_config import TEST_CONFIG
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# bots: fleet size, duration: measured seconds after startup, rate: injected
+# messages per second across the fleet. The soak scenario runs the
+# configured test_duration on a clock accelerated by the given factor.
+# Every scenario logs in cold from an empty, per-run session directory
+# unless sessions is "warm": then the fleet is logged in once, unmeasured,
+# and the measured startup restores those sessions.
+SCENARIOS = {
+    "cold_start": {"bots": 20, "duration": 0, "rate": 0},
+    "warm_start": {"bots": 20, "duration": 0, "rate": 0, "sessions": "warm"},
+    "steady_idle": {"bots": 10, "duration": 120, "rate": 0},
+    "message_burst": {"bots": 10, "duration": 60, "rate": 5},
+    "soak": {"bots": 5, "duration": None, "rate": 1, "compression": 144}
+}
+
+# Result fields compared against the baseline; all are lower-is-better
+COMPARED_FIELDS = [
+    "time_to_first_active",
+    "time_to_all_active",
+    "reply_latency_p50",
+    "reply_latency_p95",
+    "cpu_seconds",
+    "rss_per_bot_mb",
+    "rss_growth_mb_per_hour",
+    "shutdown_seconds"
+]
+
+
+def replay_scenario(path, speed):
+    """Scenario that replays a recorded trace's messages instead of random traffic"""
+    _, events = traces.load(path)
+    duration = traces.summarize(events)["duration"]
+    return {
+        "bots": len({e["bot"] for e in events}),
+        # Leave the fleet time to answer the last replayed messages
+        "duration": (duration / speed if speed else 0) + 30,
+        "rate": 0,
+        "events": events,
+        "speed": speed
+    }
+
+
+class ResourceSampler:
+    """Samples CPU time and RSS of this process and its browser children"""
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _tree(self):
+        processes = [self.process]
+        try:
+            processes += self.process.children(recursive=True)
+        except psutil.Error:
+            pass
+        return processes
+
+    def sample(self):
+        rss = cpu = 0.0
+        for process in self._tree():
+            try:
+                rss += process.memory_info().rss
+                times = process.cpu_times()
+                cpu += times.user + times.system
+            except psutil.Error:
+                continue
+        self.samples.append((time.monotonic(), cpu, rss / (1024 * 1024)))
+
+    def start(self):
+        self.sample()
+        self.thread = threading.Thread(target=self._run, name="bench-sampler", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        self.sample()
+
+    def summary(self, bots):
+        start, end = self.samples[0], self.samples[-1]
+        hours = max(end[0] - start[0], 1e-9) / 3600.0
+        peak_rss = max(sample[2] for sample in self.samples)
+        return {
+            "cpu_seconds": round(end[1] - start[1], 3),
+            "rss_peak_mb": round(peak_rss, 1),
+            "rss_per_bot_mb": round(peak_rss / max(bots, 1), 1),
+            "rss_growth_mb_per_hour": round((end[2] - start[2]) / hours, 1) if len(self.samples) > 2 else None
+        }
+
+
+def _wait_settled(manager, timeout=120):
+    deadline = time.monotonic() + timeout
+    while not manager.startup_report.is_settled() and time.monotonic() < deadline:
+        time.sleep(0.5)
+
+
+def run_scenario(name, seed, scenario=None):
+    scenario = scenario or SCENARIOS[name]
+    warm = scenario.get("sessions") == "warm"
+    # Sessions never leak between scenarios or runs: each gets its own
+    # directory, and only warm scenarios use it at all
+    session_settings = TEST_CONFIG["sessions"]
+    session_dir = tempfile.mkdtemp(prefix="bench-sessions-")
+    TEST_CONFIG["sessions"] = {**session_settings, "enabled": warm, "directory": session_dir}
+    try:
+        return _run_scenario(name, seed, scenario, warm)
+    finally:
+        TEST_CONFIG["sessions"] = session_settings
+        shutil.rmtree(session_dir, ignore_errors=True)
+
+
+def _run_scenario(name, seed, scenario, warm):
+    random.seed(seed)
+    duration = scenario["duration"]
+    clock = RealClock()
+    if duration is None:
+        clock = AcceleratedClock(scenario["compression"])
+        duration = TEST_CONFIG["test_duration"] / scenario["compression"]
+
+    server = MockChatServer().start()
+    TEST_CONFIG["website_url"] = server.url
+    TEST_CONFIG["headless"] = True
+    roster = default_roster()[:scenario["bots"]]
+    if warm:
+        # Unmeasured first login against this server leaves a snapshot per bot
+        primer = BotManager(roster=roster, clock=clock)
+        primer.start_all_bots()
+        _wait_settled(primer)
+        primer.stop_all_bots()
+    sampler = ResourceSampler().start()
+    manager = BotManager(roster=roster, clock=clock)
+    traffic = None
+    try:
+        manager.start_all_bots()
+        _wait_settled(manager)
+
+        usernames = [bot.username for bot in manager.bots]
+        if scenario.get("events"):
+            bot_map = traces.map_bots(scenario["events"], usernames)
+            traffic = traces.TraceReplayer(server, scenario["events"], scenario["speed"], bot_map).start()
+        elif scenario["rate"] and duration:
+            traffic = TrafficGenerator(server, usernames, scenario["rate"], seed=seed).start()
+        time.sleep(duration)
+    finally:
+        if traffic:
+            traffic.stop()
+        sampler.stop()
+        shutdown = manager.stop_all_bots()
+        server.stop()
+
+    startup = manager.startup_report.to_dict()
+    stats = server.stats()
+    result = {
+        "scenario": name,
+        "seed": seed,
+        "sessions": "warm" if warm else "cold",
+        "bots": scenario["bots"],
+        "duration": duration,
+        "time_to_first_active": startup["time_to_first_active"],
+        "time_to_all_active": startup["time_to_all_active"],
+        "login_failures": startup["failed_attempts"],
+        "messages_injected": stats["injected"],
+        "replies": stats["replies"],
+        "reply_latency_p50": stats["reply_latency_p50"],
+        "reply_latency_p95": stats["reply_latency_p95"],
+        "history_size": max((len(bot.conversation_history) for bot in manager.bots), default=0),
+        "shutdown_seconds": shutdown["seconds"]
+    }
+    result.update(sampler.summary(scenario["bots"]))
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """List of regressions where a result is worse than baseline by more than tolerance"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for field in COMPARED_FIELDS:
+            current, previous = result.get(field), reference.get(field)
+            if current is None or not previous:
+                continue
+            change = (current - previous) / previous
+            if change > tolerance:
+                regressions.append(f"{name}.{field}: {previous} -> {current} (+{change:.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run reproducible load-test scenarios against the mock server")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--trace", help="Also run a 'replay' scenario that replays this recorded trace")
+    parser.add_argument("--trace-speed", type=float, default=1.0, help="Replay speed; 0 replays as fast as possible")
+    args = parser.parse_args()
+
+    # PROFILE=1 adds per-cycle breakdowns for the whole run under profiles/
+    profiling.start()
+    results = {name: run_scenario(name, args.seed) for name in args.scenarios}
+    if args.trace:
+        results["replay"] = run_scenario("replay", args.seed, replay_scenario(args.trace, args.trace_speed or None))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+    else:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
@@ -0,0 +1,379 @@
+import os
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import psutil
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.command import Command
+import profiling
+from test_config import TEST_CONFIG
+
+
+# Chrome switches that stop work a bot never needs: background services,
+# extensions, component and sync updates, audio and first-run UI
+LEAN_CHROME_ARGS = [
+    "--disable-background-networking",
+    "--disable-extensions",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--metrics-recording-only",
+    "--blink-settings=imagesEnabled=false"
+]
+
+# Injected into every page so CSS animations and transitions never run
+DISABLE_ANIMATIONS_JS = """
+const style = document.createElement('style');
+style.textContent = '*, *::before, *::after { animation: none !important; transition: none !important; }';
+document.addEventListener('DOMContentLoaded', () => document.head.appendChild(style));
+"""
+
+
+def build_chrome_options(profile_dir=None):
+    """Chrome options shared by pooled and standalone drivers"""
+    options = webdriver.ChromeOptions()
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={profile_dir}")
+    if TEST_CONFIG["headless"]:
+        options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    profile = TEST_CONFIG["launch_profile"]
+    if profile["lean"]:
+        for arg in LEAN_CHROME_ARGS:
+            options.add_argument(arg)
+        options.add_argument(f"--renderer-process-limit={profile['renderer_process_limit']}")
+        options.add_argument(f"--js-flags=--max-old-space-size={profile['renderer_heap_mb']}")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return options
+
+
+def apply_launch_profile(driver):
+    """Per-tab CDP setup for the lean profile: block unneeded requests and animations"""
+    profile = TEST_CONFIG["launch_profile"]
+    if not profile["lean"]:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": profile["blocked_urls"]})
+        driver.execute_cdp_cmd("Emulation.setEmulatedMedia", {
+            "features": [{"name": "prefers-reduced-motion", "value": "reduce"}]
+        })
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": DISABLE_ANIMATIONS_JS})
+    except Exception as e:
+        logging.error(f"Failed to apply lean launch profile: {str(e)}")
+
+
+def driver_processes(driver):
+    """chromedriver and the Chrome process tree it started, for standalone drivers"""
+    # A pooled tab would resolve service to the shared Chrome's, which is
+    # not this bot's to measure or kill
+    if isinstance(driver, PooledDriver):
+        return []
+    service = getattr(driver, "service", None)
+    process = getattr(service, "process", None)
+    if process is None:
+        return []
+    try:
+        root = psutil.Process(process.pid)
+        return [root] + root.children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+def driver_rss_mb(driver):
+    rss = 0
+    for process in driver_processes(driver):
+        try:
+            rss += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return rss / (1024 * 1024)
+
+
+def kill_driver_processes(driver):
+    """Force-kill a standalone driver's process tree; pooled drivers share theirs and are left alone"""
+    for process in reversed(driver_processes(driver)):
+        try:
+            process.kill()
+        except psutil.Error:
+            continue
+
+
+def kill_orphan_browsers():
+    """Kill chromedriver/Chrome process trees this process started and never reaped; returns how many"""
+    try:
+        children = psutil.Process(os.getpid()).children()
+    except psutil.Error:
+        return 0
+    killed = 0
+    for child in children:
+        try:
+            if "chrome" not in child.name().lower():
+                continue
+            tree = [child] + child.children(recursive=True)
+        except psutil.Error:
+            continue
+        for process in reversed(tree):
+            try:
+                process.kill()
+            except psutil.Error:
+                continue
+        killed += 1
+    return killed
+
+
+class PooledDriver:
+    """Per-bot view of a shared Chrome instance.
+
+    Behaves like a regular WebDriver, but every command first switches the
+    shared session to this bot's tab while holding the browser lock, so bots
+    sharing a browser never interleave commands on the wrong tab.
+    """
+
+    def __init__(self, browser, handle, context_id, username):
+        self._browser = browser
+        self._handle = handle
+        self._context_id = context_id
+        self.username = username
+        self._released = False
+
+    def execute(self, driver_command, params=None):
+        if self._browser.dead:
+            # Fail fast instead of queueing on the lock a wedged command holds
+            raise WebDriverException(f"Pooled browser for {self.username} was evicted")
+        with self._browser.lock:
+            self._browser.focus(self._handle)
+            # Run the stock WebDriver.execute against this proxy so returned
+            # elements are parented here and route back through this method
+            return webdriver.Remote.execute(self, driver_command, params)
+
+    def __getattr__(self, name):
+        # Bind WebDriver methods and properties to this proxy; plain session
+        # state (session_id, command_executor, ...) comes from the real driver
+        for klass in type(self._browser.driver).__mro__:
+            if name in vars(klass):
+                attr = vars(klass)[name]
+                if isinstance(attr, property):
+                    return attr.fget(self)
+                if isinstance(attr, types.FunctionType):
+                    return types.MethodType(attr, self)
+                break
+        return getattr(self._browser.driver, name)
+
+    def close(self):
+        self.quit()
+
+    def quit(self):
+        self._browser.pool.release(self)
+
+    def evict(self):
+        """Give up on this tab's browser without waiting on its lock; see BrowserPool.evict"""
+        self._browser.pool.evict(self)
+
+
+class _Browser:
+    def __init__(self, pool):
+        self.pool = pool
+        self.driver = None
+        self.home_handle = None
+        self.current_handle = None
+        self.slots = 0
+        self.lock = threading.RLock()
+        # Set once the browser is evicted; its tabs then refuse every command
+        self.dead = False
+        # Set once the browser is worn out; it takes no new tabs and is quit
+        # when its last bot moves on
+        self.draining = False
+        self.launched_at = None
+
+    def launch(self):
+        self.driver = profiling.instrument(webdriver.Chrome(options=build_chrome_options()))
+        self.launched_at = time.time()
+        self.home_handle = self.driver.current_window_handle
+        self.current_handle = self.home_handle
+        logging.info(f"Browser pool launched Chrome instance {len(self.pool.browsers)}")
+
+    def focus(self, handle):
+        if self.current_handle != handle:
+            self.driver.execute(Command.SWITCH_TO_WINDOW, {"handle": handle})
+            self.current_handle = handle
+
+    def open_slot(self, username):
+        with self.lock:
+            if self.driver is None:
+                self.launch()
+            self.focus(self.home_handle)
+            context_id = None
+            if self.pool.isolate_contexts:
+                # A fresh browser context gives the bot its own cookie jar,
+                # local storage and cache inside the shared Chrome process
+                context_id = self.driver.execute_cdp_cmd(
+                    "Target.createBrowserContext", {"disposeOnDetach": False}
+                )["browserContextId"]
+                handle = self.driver.execute_cdp_cmd(
+                    "Target.createTarget", {"url": "about:blank", "browserContextId": context_id}
+                )["targetId"]
+            else:
+                self.driver.switch_to.new_window("tab")
+                handle = self.driver.current_window_handle
+            self.current_handle = None
+            return PooledDriver(self, handle, context_id, username)
+
+    def close_slot(self, pooled):
+        with self.lock:
+            if self.driver is None:
+                return
+            try:
+                self.focus(self.home_handle)
+                if pooled._context_id:
+                    self.driver.execute_cdp_cmd("Target.closeTarget", {"targetId": pooled._handle})
+                    self.driver.execute_cdp_cmd(
+                        "Target.disposeBrowserContext", {"browserContextId": pooled._context_id}
+                    )
+                else:
+                    self.focus(pooled._handle)
+                    self.driver.close()
+                    self.current_handle = None
+            except Exception as e:
+                logging.error(f"Browser pool failed to close tab for {pooled.username}: {str(e)}")
+
+    def quit(self):
+        with self.lock:
+            if self.driver:
+                try:
+                    self.driver.quit()
+                except Exception as e:
+                    logging.error(f"Browser pool failed to quit Chrome: {str(e)}")
+                self.driver = None
+
+    def worn_out(self, max_age, max_rss_mb_per_bot, now):
+        """Why this browser should be recycled, or None; RSS is judged per bot sharing it"""
+        if self.launched_at and now - self.launched_at > max_age:
+            return "reached max age"
+        if self.driver is not None and self.slots:
+            rss = driver_rss_mb(self.driver)
+            if rss / self.slots > max_rss_mb_per_bot:
+                return f"using {rss:.0f} MB for {self.slots} bots"
+        return None
+
+    def retire(self, timeout):
+        """Quit, killing the process tree if that takes longer than timeout; True if it quit cleanly"""
+        driver = self.driver
+        quitter = threading.Thread(target=self.quit, daemon=True)
+        quitter.start()
+        quitter.join(timeout)
+        if quitter.is_alive() and driver is not None:
+            kill_driver_processes(driver)
+            return False
+        return True
+
+
+class BrowserPool:
+    """Shares a small number of Chrome instances between many bots"""
+
+    def __init__(self, bots_per_browser=None, isolate_contexts=None):
+        settings = TEST_CONFIG["browser_pool"]
+        self.bots_per_browser = bots_per_browser or settings["bots_per_browser"]
+        self.isolate_contexts = settings["isolate_contexts"] if isolate_contexts is None else isolate_contexts
+        self.browsers = []
+        self._lock = threading.Lock()
+
+    def acquire(self, username):
+        """Return a driver for a bot, launching a new Chrome only when all are full"""
+        with self._lock:
+            browser = next((b for b in self.browsers if not b.draining and b.slots < self.bots_per_browser), None)
+            if browser is None:
+                browser = _Browser(self)
+                self.browsers.append(browser)
+            browser.slots += 1
+        try:
+            pooled = browser.open_slot(username)
+            apply_launch_profile(pooled)
+            return pooled
+        except Exception:
+            with self._lock:
+                browser.slots -= 1
+            raise
+
+    def release(self, pooled):
+        browser = pooled._browser
+        if not browser.dead:
+            browser.close_slot(pooled)
+        self._drop_slot(pooled)
+
+    def drain_worn(self, max_age, max_rss_mb_per_bot):
+        """Mark browsers past max_age or the per-bot RSS cap as draining; returns the newly drained ones.
+
+        Their bots keep running until the supervisor restarts them onto a
+        fresh browser, and the last one to leave quits the old Chrome.
+        """
+        now = time.time()
+        with self._lock:
+            browsers = [b for b in self.browsers if not b.draining and not b.dead]
+        drained = []
+        for browser in browsers:
+            reason = browser.worn_out(max_age, max_rss_mb_per_bot, now)
+            if reason:
+                browser.draining = True
+                drained.append(browser)
+                logging.warning(f"Browser pool draining a shared Chrome that {reason}")
+        return drained
+
+    def evict(self, pooled):
+        """Take pooled's browser out of service when it stops responding.
+
+        No new bots are placed on it, the other bots' commands fail so the
+        supervisor moves them to a fresh browser, and once every tab has let
+        go the Chrome is quit, or killed if it won't.
+        """
+        browser = pooled._browser
+        with self._lock:
+            browser.dead = True
+            if browser in self.browsers:
+                self.browsers.remove(browser)
+        logging.error(f"Browser pool evicted the Chrome shared by {pooled.username}")
+        self._drop_slot(pooled)
+
+    def _drop_slot(self, pooled):
+        browser = pooled._browser
+        with self._lock:
+            # A release stuck behind a wedged command may finish after evict()
+            if pooled._released:
+                return
+            pooled._released = True
+            browser.slots -= 1
+            idle = browser.slots == 0
+            if idle and browser in self.browsers:
+                self.browsers.remove(browser)
+        if not idle:
+            return
+        if browser.dead:
+            threading.Thread(
+                target=browser.retire, args=(TEST_CONFIG["shutdown"]["quit_timeout"],), daemon=True
+            ).start()
+        else:
+            browser.quit()
+
+    def close_all(self, timeout=None):
+        """Quit every Chrome in parallel; ones still running after timeout seconds are killed.
+
+        Returns how many had to be killed.
+        """
+        with self._lock:
+            browsers, self.browsers = self.browsers, []
+        with ThreadPoolExecutor(max_workers=max(1, len(browsers)), thread_name_prefix="pool-close") as executor:
+            retired = list(executor.map(lambda browser: browser.retire(timeout), browsers))
+        killed = retired.count(False)
+        if killed:
+            logging.error(f"Browser pool killed {killed} Chrome instances that did not quit within {timeout}s")
+        return killed
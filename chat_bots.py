@@ -9,78 +9,185 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import logging
 import json
 import os
+import signal
+import sys
 from datetime import datetime
 from test_config import TEST_CONFIG
 from selenium.webdriver.common.keys import Keys
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename='chat_bots.log'
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import deque
+from browser_pool import (
+    BrowserPool, PooledDriver, apply_launch_profile, build_chrome_options, kill_driver_processes, kill_orphan_browsers
+)
+from history import ConversationHistory
+from conversations import ConversationQueue
+from page_selectors import PageElements
+from session_store import SessionStore
+from scheduler import BotScheduler
+from supervisor import BotSupervisor
+from governor import ResourceGovernor
+import metrics
+import log_pipeline
+import live_config
+import corpus
+import traces
+import profiling
+from clock import get as default_clock
+from startup import TokenBucket, StartupReport
+from roster import (
+    INDIAN_MALE_NAMES, AMERICAN_MALE_NAMES, INDIAN_FEMALE_NAMES, AMERICAN_FEMALE_NAMES,
+    default_roster, generator_for
 )
 
-# Bot names
-INDIAN_MALE_NAMES = [
-    "Arjun", "Rahul", "Amit", "Rajesh", "Vikram", "Priyank", "Aditya", "Rohan",
-    "Neeraj", "Sachin", "Ankit", "Deepak", "Ravi", "Sanjay", "Manoj", "Kunal",
-    "Prakash", "Vishal", "Sunil", "Nitin"
-]
+# Configure logging: bot threads only enqueue records, a writer thread does the I/O
+log_pipeline.configure()
 
-AMERICAN_MALE_NAMES = [
-    "James", "John", "Michael", "David", "William", "Richard", "Joseph", "Thomas",
-    "Charles", "Christopher"
-]
+# Installs a MutationObserver (once per page load) that counts DOM changes
+# under the watched selectors, then waits until a change happens after the
+# baseline or the timeout expires. The baseline also records the unread
+# badge, and a badge above that count is a change too, so messages the
+# observer's selectors miss still wake the bot.
+CHAT_EVENT_WAIT_JS = """
+const [baseline, timeoutMs, selectors, badgeSelector, done] = arguments;
+let state = window.__chatBotEvents;
+if (!state) {
+  state = window.__chatBotEvents = {seq: 0, ts: 0, waiters: []};
+  const watched = (node) => node && node.nodeType === 1 &&
+    selectors.some((s) => node.closest(s) || node.querySelector(s));
+  new MutationObserver((mutations) => {
+    const hit = mutations.some((m) => {
+      const target = m.target.nodeType === 1 ? m.target : m.target.parentElement;
+      return (target && selectors.some((s) => target.closest(s))) || Array.from(m.addedNodes).some(watched);
+    });
+    if (!hit) return;
+    state.seq += 1;
+    if (!state.ts) state.ts = Date.now();
+    state.waiters.splice(0).forEach((wake) => wake());
+  }).observe(document.body, {childList: true, subtree: true, characterData: true});
+}
+const unread = () => {
+  const badge = badgeSelector && document.querySelector(badgeSelector);
+  return badge ? parseInt(badge.textContent, 10) || 0 : 0;
+};
+let since = baseline;
+if (since === null) {
+  // Unread messages the last cycle could not act on (no bell, a row without
+  // a name) keep the badge up; only a rise above this count is news
+  since = {seq: state.seq, unread: unread()};
+  state.ts = 0;
+}
+const changed = () => state.seq > since.seq || unread() > since.unread;
+const finish = () => done({changed: changed(), baseline: since, ts: state.ts});
+if (changed() || timeoutMs <= 0) return finish();
+const timer = setTimeout(finish, timeoutMs);
+state.waiters.push(() => { clearTimeout(timer); finish(); });
+"""
 
-INDIAN_FEMALE_NAMES = [
-    "Priya", "Neha", "Anjali", "Meera", "Pooja", "Ritu", "Anita", "Deepika",
-    "Sneha", "Kavita", "Rani", "Sunita", "Lakshmi", "Geeta", "Maya"
-]
+# Selectors shared by monitor_chat and the batched extraction scripts
+UNREAD_USER_SELECTOR = "div.absolute.right-0.mt-2.w-64.bg-white.rounded-lg.shadow-lg.py-1.z-50.border.border-gray-200 div.px-4.py-3"
+UNREAD_NAME_SELECTOR = "span.font-medium.text-gray-900"
+CHAT_MESSAGE_SELECTOR = "div.chat-message"
 
-AMERICAN_FEMALE_NAMES = [
-    "Mary", "Patricia", "Jennifer", "Linda", "Elizabeth", "Barbara", "Susan",
-    "Jessica", "Sarah", "Karen"
-]
+# Return every unread-user row with its name in one WebDriver round-trip
+UNREAD_USERS_JS = """
+return Array.from(document.querySelectorAll(arguments[0])).map((row) => {
+  const name = row.querySelector(arguments[1]);
+  return {element: row, name: name ? name.innerText.trim() : ""};
+});
+"""
+
+# Return every chat message's id and text in one WebDriver round-trip. The id
+# comes from the markup when the page provides one, else the message position
+# (flagged positional, since positions are only ordered, not unique forever).
+CHAT_MESSAGES_JS = """
+return Array.from(document.querySelectorAll(arguments[0])).map((node, index) => {
+  const pageId = node.dataset.messageId || node.dataset.id || node.id;
+  return {id: pageId || index, positional: !pageId, text: node.innerText.trim()};
+});
+"""
 
 class ChatBot:
-    def __init__(self, username, gender):
+    # Whether BotScheduler may drive this bot's monitor_cycle
+    schedulable = True
+    # Whether the bot runs a Chrome the resource governor has to make room for
+    uses_browser = True
+
+    def __init__(self, username, gender, clock=None):
         self.username = username
         self.gender = gender
+        self.log = log_pipeline.bot_logger(username)
+        # Paces the bot's behaviour; an accelerated clock compresses long runs
+        self.clock = clock or default_clock()
+        # Settings read on every cycle come from this snapshot, swapped whole by apply_config
+        self.config = live_config.current()
         self.age = random.randint(16, 32)
         self.driver = None
         self.is_active = False
         self.last_question_time = 0
         self.consecutive_questions = 0
-        self.conversation_topics = TEST_CONFIG["conversation_settings"]["conversation_topics"].copy()
+        self.conversation_topics = list(self.config["conversation_settings"]["conversation_topics"])
         random.shuffle(self.conversation_topics)
         self.current_topic_index = 0
-        self.conversation_history = []
+        history_settings = TEST_CONFIG["history"]
+        compact_path = None
+        if history_settings["compact_dir"]:
+            compact_path = os.path.join(history_settings["compact_dir"], f"{username}.jsonl")
+        self.conversation_history = ConversationHistory(history_settings["per_peer_window"], compact_path)
+        self.conversations = ConversationQueue(self.config["conversations"]["policy"])
         self.thread = None
+        self.task = None
+        # Health state read by BotSupervisor
+        self.last_heartbeat = None
+        self.driver_started_at = None
+        self.generation = 0
+        self.stopped = False
+        # Set while the resource governor has the bot parked for lack of headroom
+        self.paused = False
+        # Set to cut every pause short when the bot is told to stop
+        self.stop_event = threading.Event()
+        self.last_event_time = None
+        self.reply_latencies = deque(maxlen=1000)
+        self._script_timeout = None
+        self.elements = None
+        self.session_store = None
+        if TEST_CONFIG["sessions"]["enabled"]:
+            self.session_store = SessionStore(TEST_CONFIG["sessions"]["directory"], TEST_CONFIG["sessions"]["max_age"])
         
-    def setup_driver(self):
-        options = webdriver.ChromeOptions()
-        if TEST_CONFIG["headless"]:
-            options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        self.driver = webdriver.Chrome(options=options)
-        self.driver.implicitly_wait(10)
+    def setup_driver(self, pool=None):
+        # The script timeout cache describes the old driver; a new session starts at chromedriver's default
+        self._script_timeout = None
+        if pool is not None:
+            # Implicit waits are session-wide and would hold the shared
+            # browser lock while polling, so pooled bots rely on explicit waits
+            self.driver = pool.acquire(self.username)
+            self.driver_started_at = time.time()
+            self.elements = PageElements(self.driver)
+            return
+        profile_dir = None
+        if self.session_store and TEST_CONFIG["sessions"]["persist_profile"]:
+            profile_dir = self.session_store.profile_dir(self.username)
+        self.driver = profiling.instrument(webdriver.Chrome(options=build_chrome_options(profile_dir)))
+        self.driver_started_at = time.time()
+        apply_launch_profile(self.driver)
+        # Every lookup goes through PageElements with its own short explicit
+        # timeout; an implicit wait would stretch each miss on top of it
+        self.driver.implicitly_wait(0)
+        self.elements = PageElements(self.driver)
         
+    @profiling.spanned("login")
     def login(self):
+        if self.session_store and self.restore_session():
+            return True
+
+        start = time.perf_counter()
         try:
             self.driver.get(TEST_CONFIG["website_url"])
+            self.elements.invalidate()
             
             # Wait for login form elements
-            username_field = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.NAME, "username"))
-            )
-            gender_select = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.NAME, "gender"))
-            )
-            age_field = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.NAME, "age"))
-            )
+            username_field = self.elements.find("username_field")
+            gender_select = self.elements.find("gender_select")
+            age_field = self.elements.find("age_field")
             
             # Fill in the form
             username_field.send_keys(self.username)
@@ -93,104 +200,76 @@ class ChatBot:
             age_field.send_keys(str(self.age))
             
             # Find and click login button
-            login_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[@type='submit']"))
-            )
-            login_button.click()
+            self.elements.click("login_button")
+            self.elements.invalidate()
             
             # Wait for successful login
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "chat-container"))
-            )
+            self.elements.find("chat_container", timeout=10)
             
-            logging.info(f"Bot {self.username} logged in successfully")
+            self.log.info("Bot %s logged in successfully", self.username)
+            self.record_login(start, "success", "cold")
+            self.save_session()
             self.is_active = True
             return True
             
         except Exception as e:
-            logging.error(f"Login failed for {self.username}: {str(e)}")
+            self.log.error("Login failed for %s: %s", self.username, e)
+            self.record_login(start, "failure", "cold")
             self.is_active = False
             return False
+
+    def restore_session(self):
+        """Warm login: reuse a saved session and skip the form while it is still valid"""
+        start = time.perf_counter()
+        try:
+            if not self.session_store.restore(self.username, self.driver, TEST_CONFIG["website_url"]):
+                return False
+            self.elements.invalidate()
+            # Checked with a script so the implicit wait cannot stretch the short timeout
+            WebDriverWait(self.driver, TEST_CONFIG["sessions"]["warm_timeout"]).until(
+                lambda driver: driver.execute_script("return !!document.querySelector('.chat-container');")
+            )
+        except Exception as e:
+            self.log.info("Bot %s saved session is no longer valid, logging in again: %s", self.username, e)
+            self.session_store.discard(self.username)
+            self.record_login(start, "failure", "warm")
+            return False
+        elapsed = time.perf_counter() - start
+        self.log.info("Bot %s restored saved session in %.2fs", self.username, elapsed)
+        self.record_login(start, "success", "warm")
+        self.is_active = True
+        return True
+
+    def save_session(self):
+        if not self.session_store:
+            return
+        try:
+            self.session_store.save(self.username, self.driver)
+        except Exception as e:
+            self.log.error("Failed to save session for %s: %s", self.username, e)
+
+    def record_login(self, start, result, mode="cold"):
+        metrics.LOGIN_SECONDS.observe(time.perf_counter() - start, bot=self.username, result=result, mode=mode)
+        metrics.LOGINS.inc(bot=self.username, result=result, mode=mode)
+        if result == "success":
+            traces.record(self.username, "login", mode=mode)
             
     def get_random_response(self):
-        responses = [
-            "That's interesting! Tell me more.",
-            "I can relate to that.",
-            "Really? That's fascinating!",
-            "I understand what you mean.",
-            "That's a great point!",
-            "I agree with you.",
-            "That's something I hadn't considered.",
-            "Interesting perspective!",
-            "I see what you're saying.",
-            "That makes sense to me."
-        ]
-        return random.choice(responses)
+        return corpus.CORPUS.response()
 
     def get_question_for_topic(self, topic):
-        questions = {
-            "hobbies": [
-                "What do you like to do in your free time?",
-                "Do you have any interesting hobbies?",
-                "What activities do you enjoy most?"
-            ],
-            "movies": [
-                "What kind of movies do you like?",
-                "Who's your favorite actor?",
-                "What's the last movie you watched?"
-            ],
-            "music": [
-                "What type of music do you listen to?",
-                "Who's your favorite artist?",
-                "What's your favorite song?"
-            ],
-            "travel": [
-                "Have you been to any interesting places?",
-                "Where would you like to travel?",
-                "What's your dream destination?"
-            ],
-            "food": [
-                "What's your favorite cuisine?",
-                "Do you like cooking?",
-                "What's your favorite restaurant?"
-            ],
-            "sports": [
-                "Do you follow any sports?",
-                "What's your favorite team?",
-                "Do you play any sports?"
-            ],
-            "technology": [
-                "What gadgets do you use?",
-                "Are you interested in new technology?",
-                "What's your favorite app?"
-            ],
-            "books": [
-                "Do you like reading?",
-                "What's your favorite book?",
-                "What genre do you prefer?"
-            ],
-            "fashion": [
-                "What's your style like?",
-                "Do you follow fashion trends?",
-                "What's your favorite clothing brand?"
-            ],
-            "daily life": [
-                "How do you usually spend your day?",
-                "What's your morning routine?",
-                "What do you do to relax?"
-            ]
-        }
-        return random.choice(questions.get(topic, ["Tell me more about yourself."]))
+        return corpus.CORPUS.question(topic)
 
     def simulate_typing(self, message):
-        typing_delay = random.uniform(*TEST_CONFIG["conversation_settings"]["typing_delay"])
-        time.sleep(typing_delay)
+        typing_delay = random.uniform(*self.config["conversation_settings"]["typing_delay"])
+        self.pause(typing_delay)
         # Add typing simulation logic here
 
     def ask_question(self):
-        current_time = time.time()
-        if (current_time - self.last_question_time >= TEST_CONFIG["conversation_settings"]["question_interval"] and 
-            self.consecutive_questions < TEST_CONFIG["conversation_settings"]["max_consecutive_questions"]):
+        current_time = self.clock.time()
+        settings = self.config["conversation_settings"]
+        if (current_time - self.last_question_time >= settings["question_interval"] and 
+            self.consecutive_questions < settings["max_consecutive_questions"]):
             
             topic = self.conversation_topics[self.current_topic_index]
             question = self.get_question_for_topic(topic)
@@ -205,174 +284,603 @@ class ChatBot:
         return False
 
     def monitor_chat(self):
-        logging.info(f"Bot {self.username} started monitoring chat")
-        while self.is_active:
-            try:
-                # First, check if we're in the chat room
-                try:
-                    chat_container = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.CLASS_NAME, "chat-container"))
-                    )
-                except:
-                    logging.error(f"Bot {self.username} not in chat container, attempting to rejoin")
-                    self.driver.refresh()
-                    time.sleep(5)
-                    continue
+        self.log.info("Bot %s started monitoring chat", self.username)
+        # A recycled bot bumps its generation so a stale thread exits instead
+        # of running alongside the new one
+        generation = self.generation
+        while self.is_active and self.generation == generation:
+            # The pause after a cycle belongs to it, so a profiled cycle runs until the next one starts
+            with profiling.span(self.username):
+                delay, idle = self.monitor_cycle()
+                if not self.is_active or self.generation != generation:
+                    break
+                if idle:
+                    self.idle_wait(delay)
+                else:
+                    self.pause(delay)
 
-                # Check for notification bell icon
+    def monitor_cycle(self):
+        """Scan for unread peers and serve one conversation; returns (delay, idle) for the pause that should follow"""
+        metrics.CYCLES.inc(bot=self.username)
+        self.last_heartbeat = time.time()
+        try:
+            # First, check if we're in the chat room
+            if not self.elements.present("chat_container"):
+                self.log.error("Bot %s not in chat container, attempting to rejoin", self.username)
+                self.driver.refresh()
+                self.elements.invalidate()
+                return 5, False
+
+            # Check for notification bell icon
+            scan_start = time.perf_counter()
+            with profiling.phase("bell_scan"):
                 try:
-                    # Look for the bell icon button using exact class from Dashboard.tsx
-                    bell_button = WebDriverWait(self.driver, 3).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, "button.p-2.text-gray-600"))
-                    )
-                    
-                    # Click bell icon to open notification panel
-                    bell_button.click()
-                    logging.info(f"Bot {self.username} clicked notification bell")
-                    time.sleep(1)  # Wait for notification panel to open
-                    
-                    # Look for users with unread messages in the dropdown
-                    try:
-                        unread_users = WebDriverWait(self.driver, 3).until(
-                            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.absolute.right-0.mt-2.w-64.bg-white.rounded-lg.shadow-lg.py-1.z-50.border.border-gray-200 div.px-4.py-3"))
-                        )
-                        
-                        for user_element in unread_users:
-                            try:
-                                # Get user name from notification
-                                user_name = user_element.find_element(By.CSS_SELECTOR, "span.font-medium.text-gray-900").text
-                                logging.info(f"Bot {self.username} found unread message from: {user_name}")
-                                
-                                # Click on user to open chat
-                                user_element.click()
-                                logging.info(f"Bot {self.username} clicked on user: {user_name}")
-                                time.sleep(2)  # Wait for chat window to open
-                                
-                                # Handle chat messages
-                                try:
-                                    chat_messages = WebDriverWait(self.driver, 5).until(
-                                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.chat-message"))
-                                    )
-                                    
-                                    for message in chat_messages:
-                                        try:
-                                            message_text = message.text.strip()
-                                            if not message_text or message_text in self.conversation_history:
-                                                continue
-                                                
-                                            self.conversation_history.append(message_text)
-                                            logging.info(f"Bot {self.username} received new message from {user_name}: {message_text}")
-                                            
-                                            # Generate and send response
-                                            response = self.get_random_response()
-                                            logging.info(f"Bot {self.username} preparing to send response to {user_name}: {response}")
-                                            
-                                            # Find the message input field
-                                            message_input = WebDriverWait(self.driver, 5).until(
-                                                EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder='Type your message']"))
-                                            )
-                                            
-                                            if message_input:
-                                                message_input.clear()
-                                                message_input.send_keys(response)
-                                                
-                                                # Find and click the send button
-                                                try:
-                                                    send_button = WebDriverWait(self.driver, 3).until(
-                                                        EC.element_to_be_clickable((By.CSS_SELECTOR, "button[class*='send']"))
-                                                    )
-                                                    send_button.click()
-                                                    logging.info(f"Bot {self.username} clicked send button to {user_name}")
-                                                except:
-                                                    # If no send button, try Enter key
-                                                    message_input.send_keys(Keys.RETURN)
-                                                    logging.info(f"Bot {self.username} sent message to {user_name} using Enter key")
-                                                
-                                                time.sleep(random.uniform(2, 4))
-                                        except Exception as e:
-                                            logging.error(f"Error processing message for {self.username} from {user_name}: {str(e)}")
-                                            continue
-                                            
-                                except Exception as e:
-                                    logging.error(f"Error handling chat messages for {self.username} with {user_name}: {str(e)}")
-                                    continue
-                                    
-                            except Exception as e:
-                                logging.error(f"Error handling user notification for {self.username}: {str(e)}")
-                                continue
-                                
-                    except TimeoutException:
-                        logging.debug(f"Bot {self.username} no unread users found")
-                        # Close notification panel if open
-                        try:
-                            # Click outside the notification panel to close it
-                            bell_button.click()
-                        except:
-                            pass
-                        time.sleep(1)
-                        continue
-                        
+                    # Click bell icon to open notification panel; read_unread_users
+                    # waits for its rows, so no fixed settle time is needed
+                    bell_button = self.elements.click("notification_bell")
+                    self.log.info("Bot %s clicked notification bell", self.username)
                 except TimeoutException:
                     # No notification bell found, continue monitoring
-                    logging.debug(f"Bot {self.username} no notification bell found")
-                    time.sleep(1)
-                    continue
-                    
-                # Random delay between checks
-                time.sleep(random.uniform(1, 3))
-                
-            except TimeoutException:
-                logging.debug(f"Bot {self.username} timeout while monitoring, retrying...")
-                time.sleep(1)
+                    self.log.debug("Bot %s no notification bell found", self.username, extra={"sample": "no_bell"})
+                    return 1, True
+
+                # Look for users with unread messages in the dropdown
+                try:
+                    unread_users = self.read_unread_users()
+                except TimeoutException:
+                    self.log.debug("Bot %s no unread users found", self.username, extra={"sample": "no_unread"})
+                    unread_users = []
+            metrics.SCAN_SECONDS.observe(time.perf_counter() - scan_start, bot=self.username)
+
+            now = self.clock.time()
+            self.conversations.policy = self.config["conversations"]["policy"]
+            self.conversations.sync(unread_users, now)
+            traces.record_unread(self.username, [row["name"] for row in unread_users if row["name"]])
+            conversation = self.conversations.next_ready(now)
+            if conversation is None:
+                # Close notification panel if open
+                try:
+                    # Click outside the notification panel to close it
+                    bell_button.click()
+                except:
+                    pass
+                wake = self.conversations.next_wake(now)
+                if wake is not None:
+                    # Only paced peers are waiting: come back when the first one is due
+                    return wake, False
+                return (1 if not unread_users else random.uniform(1, 3)), True
+
+            try:
+                self.serve_conversation(conversation)
             except Exception as e:
-                logging.error(f"Error monitoring chat for {self.username}: {str(e)}")
-                self.is_active = False
-                
+                self.log.error("Error handling user notification for %s: %s", self.username, e)
+                self.conversations.served(conversation.peer, self.clock.time(), 0)
+
+            # Go straight on to the next peer while others are ready
+            if self.conversations.ready_count(self.clock.time()):
+                return 0, False
+            return random.uniform(1, 3), True
+            
+        except TimeoutException:
+            self.log.debug("Bot %s timeout while monitoring, retrying...", self.username, extra={"sample": "cycle_timeout"})
+            return 1, False
+        except Exception as e:
+            self.log.error("Error monitoring chat for %s: %s", self.username, e)
+            self.is_active = False
+            return 0, False
+
+    def serve_conversation(self, conversation):
+        """Open one peer's chat, read what is new and answer it with a single reply"""
+        user_name = conversation.peer
+        self.log.info("Bot %s found unread message from: %s", self.username, user_name, extra={"peer": user_name})
+
+        # Click on user to open chat, then wait (briefly) for the panel to go
+        # instead of a fixed sleep
+        conversation.element.click()
+        self.log.info("Bot %s clicked on user: %s", self.username, user_name, extra={"peer": user_name})
+        try:
+            with profiling.wait("chat_open"):
+                WebDriverWait(self.driver, 2).until(EC.staleness_of(conversation.element))
+        except TimeoutException:
+            pass
+
+        # Handle chat messages
+        try:
+            chat_messages = self.read_chat_messages()
+        except Exception as e:
+            self.log.error("Error handling chat messages for %s with %s: %s", self.username, user_name, e, extra={"peer": user_name})
+            self.conversations.served(user_name, self.clock.time(), 0)
+            return
+
+        received_at = time.perf_counter()
+        self.conversation_history.align(
+            user_name, [(message["id"], message["text"]) for message in chat_messages if message.get("positional")]
+        )
+        new_messages = []
+        for message in chat_messages:
+            message_text = message["text"]
+            if not message_text or not self.conversation_history.add(
+                    user_name, message["id"], message_text, message.get("positional", False)):
+                continue
+            self.log.info("Bot %s received new message from %s: %s", self.username, user_name, message_text, extra={"peer": user_name})
+            metrics.MESSAGES_RECEIVED.inc(bot=self.username)
+            traces.record_message(self.username, user_name, message["id"], message_text, conversation.waiting_since)
+            new_messages.append(message)
+
+        if not new_messages:
+            self.conversations.served(user_name, self.clock.time(), 0)
+            return
+        pace = random.uniform(*self.config["conversations"]["reply_pacing"])
+        try:
+            # One reply answers everything new in this visit; the peer's pacing
+            # timer, not a sleep, spaces it from the next reply to the same peer
+            response = self.send_reply(user_name, received_at)
+            # Arrival-to-reply in poll and push mode alike; REPLY_LATENCY_SECONDS is push mode only
+            latency = self.clock.time() - conversation.waiting_since
+            metrics.ARRIVAL_REPLY_SECONDS.observe(latency, bot=self.username)
+            traces.record(self.username, "reply", peer=user_name, text=response, latency=round(latency, 3))
+        except Exception as e:
+            self.log.error("Error processing message for %s from %s: %s", self.username, user_name, e, extra={"peer": user_name})
+        self.conversations.served(user_name, self.clock.time(), pace)
+
+    @profiling.phased("send")
+    def send_reply(self, user_name, received_at):
+        # Generate and send response
+        response = self.get_random_response()
+        self.log.info("Bot %s preparing to send response to %s: %s", self.username, user_name, response, extra={"peer": user_name})
+        
+        # Find the message input field
+        send_start = time.perf_counter()
+        message_input = self.elements.find("message_input")
+        message_input.clear()
+        message_input.send_keys(response)
+        
+        # Find and click the send button
+        try:
+            self.elements.click("send_button")
+            self.log.info("Bot %s clicked send button to %s", self.username, user_name, extra={"peer": user_name})
+        except:
+            # If no send button, try Enter key
+            message_input.send_keys(Keys.RETURN)
+            self.log.info("Bot %s sent message to %s using Enter key", self.username, user_name, extra={"peer": user_name})
+
+        sent_at = time.perf_counter()
+        metrics.SEND_SECONDS.observe(sent_at - send_start, bot=self.username)
+        metrics.REPLY_SECONDS.observe(sent_at - received_at, bot=self.username)
+        metrics.MESSAGES_SENT.inc(bot=self.username)
+        self.record_reply_latency(user_name)
+        return response
+            
+
+    def read_unread_users(self, timeout=3):
+        """Unread-user rows as [{"element", "name"}], fetched in a single script call per poll"""
+        with profiling.wait("unread_users"):
+            return WebDriverWait(self.driver, timeout).until(
+                lambda driver: driver.execute_script(UNREAD_USERS_JS, UNREAD_USER_SELECTOR, UNREAD_NAME_SELECTOR) or False
+            )
+
+    @profiling.phased("message_read")
+    def read_chat_messages(self, timeout=5):
+        """Open conversation's messages as [{"id", "text"}], fetched in a single script call per poll"""
+        with metrics.EXTRACT_SECONDS.time(bot=self.username):
+            return WebDriverWait(self.driver, timeout).until(
+                lambda driver: driver.execute_script(CHAT_MESSAGES_JS, CHAT_MESSAGE_SELECTOR) or False
+            )
+
+    @profiling.phased("sleep")
+    def pause(self, seconds):
+        """Sleep for seconds of clock time, returning early (True) once the bot is told to stop"""
+        return self.clock.wait(self.stop_event, seconds)
+
+    def push_mode(self):
+        return self.config["event_detection"]["mode"] == "push"
+
+    @profiling.phased("sleep")
+    def idle_wait(self, poll_delay):
+        """Pause between checks: a fixed sleep in poll mode, a DOM event wait in push mode"""
+        if not self.push_mode():
+            self.pause(poll_delay)
+            return
+        try:
+            # The page waits in real time, so max_wait is converted from clock time
+            self.wait_for_chat_event(self.clock.to_real(self.config["event_detection"]["max_wait"]))
+        except Exception as e:
+            self.log.error("Bot %s event wait failed, falling back to polling: %s", self.username, e)
+            self.pause(poll_delay)
+
+    def wait_for_chat_event(self, timeout):
+        """Block until the page reports a chat change or timeout seconds pass"""
+        settings = self.config["event_detection"]
+        # A pooled bot must not hold its shared browser while waiting, so it
+        # checks the observer state instantly and sleeps between checks instead
+        pooled = isinstance(self.driver, PooledDriver)
+        if not pooled and self._script_timeout != timeout + 5:
+            self.driver.set_script_timeout(timeout + 5)
+            self._script_timeout = timeout + 5
+        deadline = time.time() + timeout
+        baseline = None
+        while self.is_active:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            result = self.check_chat_event(baseline, 0 if pooled else int(remaining * 1000))
+            if result["changed"]:
+                return True
+            baseline = result["baseline"]
+            if pooled and self.stop_event.wait(min(settings["pooled_poll_interval"], max(0, deadline - time.time()))):
+                return False
+        return False
+
+    def check_chat_event(self, baseline=None, wait_ms=0):
+        """Run the observer script once, waiting at most wait_ms in the page for a change"""
+        settings = self.config["event_detection"]
+        result = self.driver.execute_async_script(
+            CHAT_EVENT_WAIT_JS, baseline, wait_ms,
+            settings["watch_selectors"], settings["unread_badge_selector"]
+        )
+        if result["changed"]:
+            self.last_event_time = result["ts"] / 1000.0 if result["ts"] else time.time()
+        return result
+
+    def record_reply_latency(self, user_name):
+        # Measures from the DOM change that woke the bot to its first reply
+        if self.last_event_time is None:
+            return
+        latency_ms = (time.time() - self.last_event_time) * 1000
+        self.last_event_time = None
+        self.reply_latencies.append(latency_ms)
+        metrics.REPLY_LATENCY_SECONDS.observe(latency_ms / 1000.0, bot=self.username)
+        self.log.info("Bot %s replied to %s %.0fms after message event", self.username, user_name, latency_ms, extra={"peer": user_name})
+
+    def apply_config(self, snapshot):
+        """Switch to a new config snapshot; the next cycle uses it in full"""
+        previous, self.config = self.config, snapshot
+        topics = snapshot["conversation_settings"]["conversation_topics"]
+        if topics != previous["conversation_settings"]["conversation_topics"]:
+            self.conversation_topics = random.sample(topics, len(topics))
+            self.current_topic_index = 0
+
     def start_monitoring(self):
+        self.last_heartbeat = time.time()
         self.thread = threading.Thread(target=self.monitor_chat)
         self.thread.daemon = True
         self.thread.start()
-                
-    def cleanup(self):
+
+    def quit_driver(self, driver, timeout):
+        """Quit driver, killing its process tree if quit() takes longer than timeout; True if it quit cleanly"""
+        quitter = threading.Thread(target=driver.quit, daemon=True)
+        quitter.start()
+        quitter.join(timeout)
+        if quitter.is_alive():
+            if isinstance(driver, PooledDriver):
+                # The Chrome is shared; evict it rather than kill it under the other bots
+                self.log.error("Bot %s pooled tab did not close within %ss, evicting its browser", self.username, timeout)
+                driver.evict()
+            else:
+                self.log.error("Bot %s driver did not quit within %ss, killing it", self.username, timeout)
+                kill_driver_processes(driver)
+            return False
+        return True
+
+    def stop_driver(self, timeout):
+        """Stop monitoring and drop the driver without waiting forever on a wedged Chrome"""
         self.is_active = False
+        self.generation += 1
+        self.last_heartbeat = None
+        # Wakes the old monitor thread; restarting clears it again
+        self.stop_event.set()
+        if self.task:
+            self.task.cancel()
+        driver, self.driver = self.driver, None
+        self._script_timeout = None
+        if driver:
+            self.quit_driver(driver, timeout)
         if self.thread:
-            self.thread.join()
+            self.thread.join(timeout)
+        self.driver_started_at = None
+
+    def signal_stop(self):
+        """Tell the bot to stop without waiting: its loop exits and any pause ends at once"""
+        self.stopped = True
+        self.is_active = False
+        self.stop_event.set()
+        if self.task:
+            self.task.cancel()
+
+    def cleanup(self, timeout=None):
+        """Stop the bot and quit its driver; with a timeout, no step waits longer than that"""
+        self.signal_stop()
+        if self.thread:
+            self.thread.join(None if timeout is None else min(timeout, TEST_CONFIG["shutdown"]["join_timeout"]))
         if self.driver:
-            self.driver.quit()
+            # Keep the freshest cookies for the next warm login, unless the
+            # monitor thread is still stuck in a browser command that the
+            # save would queue behind
+            if not (self.thread and self.thread.is_alive()):
+                self.save_session()
+            driver, self.driver = self.driver, None
+            if timeout is None:
+                driver.quit()
+            else:
+                self.quit_driver(driver, timeout)
+
+def roster_for(counts, seed=None):
+    """counts["male"] male and counts["female"] female identities from the seeded roster generator"""
+    seed = TEST_CONFIG["roster"]["seed"] if seed is None else seed
+    return generator_for(counts, seed).by_gender(counts.get("male", 0), counts.get("female", 0))
+
+def create_bot(username, gender, clock=None):
+    """Build a bot using the engine TEST_CONFIG selects for this username"""
+    engine = TEST_CONFIG["engine"]["per_bot"].get(username, TEST_CONFIG["engine"]["default"])
+    if engine == "protocol":
+        # Imported lazily: protocol_engine builds on ChatBot and needs aiohttp
+        from protocol_engine import ProtocolBot
+        return ProtocolBot(username, gender, clock)
+    return ChatBot(username, gender, clock)
 
 class BotManager:
-    def __init__(self):
+    def __init__(self, roster=None, clock=None):
         self.bots = []
-        self.create_bots()
+        self.clock = clock or default_clock()
+        self.browser_pool = None
+        self.startup_report = None
+        self.scheduler = None
+        if TEST_CONFIG["scheduler"]["mode"] == "asyncio":
+            self.scheduler = BotScheduler()
+        self._startup_executor = None
+        self._login_bucket = None
+        self._retry_timers = []
+        self._stopping = False
+        self.shutdown_report = None
+        if TEST_CONFIG["browser_pool"]["enabled"]:
+            self.browser_pool = BrowserPool()
+        self.supervisor = None
+        if TEST_CONFIG["supervisor"]["enabled"]:
+            self.supervisor = BotSupervisor(self)
+        self.governor = None
+        if TEST_CONFIG["governor"]["enabled"]:
+            self.governor = ResourceGovernor(self)
+        self.create_bots(roster)
         
-    def create_bots(self):
-        # Create male bots
-        for name in INDIAN_MALE_NAMES + AMERICAN_MALE_NAMES:
-            self.bots.append(ChatBot(name, "male"))
-            
-        # Create female bots
-        for name in INDIAN_FEMALE_NAMES + AMERICAN_FEMALE_NAMES:
-            self.bots.append(ChatBot(name, "female"))
+    def create_bots(self, roster=None):
+        # Male bots first, then female bots, unless a roster is given
+        if roster is None:
+            roster = roster_for(TEST_CONFIG["test_bots"])
+        bots = [create_bot(username, gender, self.clock) for username, gender in roster]
+        self.bots.extend(bots)
+        return bots
             
     def start_all_bots(self):
-        for bot in self.bots:
-            try:
-                bot.setup_driver()
-                if bot.login():
-                    bot.start_monitoring()
-            except Exception as e:
-                logging.error(f"Failed to start bot {bot.username}: {str(e)}")
-                
-    def stop_all_bots(self):
-        for bot in self.bots:
-            bot.cleanup()
+        futures = self.start_bots(self.bots)
+        # Block only for the first attempt of every bot; retries continue in the background
+        wait(futures)
+        logging.info(f"Startup first pass finished: {json.dumps(self.startup_report.to_dict())}")
+
+    def start_bots(self, bots):
+        """Queue bots on the rate-limited startup pipeline without waiting for them"""
+        settings = TEST_CONFIG["startup"]
+        if self._startup_executor is None:
+            self._login_bucket = TokenBucket(settings["logins_per_second"], settings["burst"])
+            self._startup_executor = ThreadPoolExecutor(
+                max_workers=settings["max_parallel"], thread_name_prefix="bot-startup"
+            )
+        # Fleet workers only ever call start_bots; the supervisor restarts
+        # their dead bots and the governor starts the ones admit() defers
+        if self.supervisor:
+            self.supervisor.start()
+        if self.governor:
+            self.governor.start()
+        if self.startup_report is None or self.startup_report.is_settled():
+            self.startup_report = StartupReport()
+        self.startup_report.expect(bot.username for bot in bots)
+        return [self._startup_executor.submit(self._start_bot, bot, 0) for bot in bots]
+
+    def resume_bots(self, bots):
+        """Start bots the governor held back; they already count toward the current startup"""
+        try:
+            return [self._startup_executor.submit(self._start_bot, bot, 0) for bot in bots]
+        except RuntimeError:
+            # Executor already shut down by stop_all_bots
+            return []
+
+    def stop_bots(self, usernames):
+        """Stop and drop the named bots while the rest keep running"""
+        usernames = set(usernames)
+        stopping = [bot for bot in self.bots if bot.username in usernames]
+        self.bots = [bot for bot in self.bots if bot.username not in usernames]
+        if self.governor:
+            self.governor.forget(stopping)
+        self._teardown(stopping, time.monotonic() + TEST_CONFIG["shutdown"]["deadline"])
+        return stopping
+
+    def add_bots(self, count):
+        """Start count more bots with the next unused identities from the roster generator"""
+        generator = generator_for(TEST_CONFIG["test_bots"], TEST_CONFIG["roster"]["seed"])
+        roster = generator.take(count, exclude={bot.username for bot in self.bots})
+        added = self.create_bots(roster)
+        if added:
+            self.start_bots(added)
+        logging.info(f"Added {len(added)} bots, fleet size {len(self.bots)}")
+        return added
+
+    def remove_bots(self, count):
+        """Retire the count most recently added bots"""
+        if count <= 0:
+            return []
+        retired = self.stop_bots([bot.username for bot in self.bots[-count:]])
+        logging.info(f"Removed {len(retired)} bots, fleet size {len(self.bots)}")
+        return retired
+
+    def scale_to(self, size):
+        """Grow or shrink the fleet to size bots; bots that stay are left running"""
+        if size > len(self.bots):
+            return self.add_bots(size - len(self.bots)), []
+        return [], self.remove_bots(len(self.bots) - size)
+
+    def reconcile(self, roster):
+        """Start bots missing from roster and retire bots not in it; the rest keep running"""
+        wanted = {username for username, _ in roster}
+        running = {bot.username for bot in self.bots}
+        retired = self.stop_bots(running - wanted)
+        added = self.create_bots([(username, gender) for username, gender in roster if username not in running])
+        if added:
+            self.start_bots(added)
+        logging.info(f"Fleet reconciled to {len(self.bots)} bots: +{len(added)} -{len(retired)}")
+        return added, retired
+
+    def apply_config(self, snapshot, previous=None, changed=()):
+        """Push a new config snapshot to every bot and resize the fleet if test_bots changed"""
+        for bot in list(self.bots):
+            bot.apply_config(snapshot)
+        if ("test_bots" in changed or "roster" in changed) and not self._stopping:
+            self.reconcile(roster_for(snapshot["test_bots"]))
+
+    def status(self):
+        return {
+            "bots": len(self.bots),
+            "active": sum(1 for bot in self.bots if bot.is_active),
+            "usernames": [bot.username for bot in self.bots],
+            "startup": self.startup_report.to_dict() if self.startup_report else None,
+            "supervisor": self.supervisor.status() if self.supervisor else None,
+            "governor": self.governor.status() if self.governor else None
+        }
+
+    def _start_bot(self, bot, attempt):
+        if self._stopping or bot not in self.bots:
+            return
+        if self.governor and not self.governor.admit(bot):
+            # Started by the governor once the host has headroom again
+            return
+        self._login_bucket.acquire()
+        try:
+            if bot.driver is None:
+                bot.setup_driver(self.browser_pool)
+            started = bot.login()
+        except Exception as e:
+            logging.error(f"Failed to start bot {bot.username}: {str(e)}")
+            started = False
+
+        if started:
+            self._start_monitoring(bot)
+            self.startup_report.record_success(bot)
+        else:
+            will_retry = attempt < TEST_CONFIG["startup"]["max_retries"] and not self._stopping
+            self.startup_report.record_failure(bot, will_retry)
+            if will_retry:
+                base, cap = TEST_CONFIG["startup"]["retry_backoff"]
+                delay = min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                logging.info(f"Retrying login for {bot.username} in {delay:.1f}s (attempt {attempt + 1})")
+                timer = threading.Timer(self.clock.to_real(delay), self._retry_bot, args=(bot, attempt + 1))
+                timer.daemon = True
+                self._retry_timers.append(timer)
+                timer.start()
+
+        if self.startup_report.is_settled():
+            logging.info(f"Startup complete: {json.dumps(self.startup_report.to_dict())}")
+
+    def _start_monitoring(self, bot):
+        if bot.stopped:
+            return
+        bot.paused = False
+        bot.stop_event.clear()
+        if self.scheduler and bot.schedulable:
+            self.scheduler.add_bot(bot)
+        else:
+            bot.start_monitoring()
+
+    def _retry_bot(self, bot, attempt):
+        if self._stopping:
+            return
+        try:
+            self._startup_executor.submit(self._start_bot, bot, attempt)
+        except RuntimeError:
+            # Executor already shut down by stop_all_bots
+            pass
+
+    def _teardown(self, bots, deadline):
+        """Signal every bot at once, then clean them up in parallel until deadline (time.monotonic()).
+
+        Bots still not done at the deadline have their browser process trees
+        killed; returns (clean, late) counts.
+        """
+        for bot in bots:
+            bot.signal_stop()
+        if not bots:
+            return 0, 0
+        settings = TEST_CONFIG["shutdown"]
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(bots), settings["max_parallel"]), thread_name_prefix="bot-shutdown"
+        )
+        futures = {executor.submit(bot.cleanup, settings["quit_timeout"]): bot for bot in bots}
+        done, pending = wait(futures, timeout=max(0, deadline - time.monotonic()))
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future in done:
+            if future.exception():
+                logging.error(f"Failed to stop bot {futures[future].username}: {str(future.exception())}")
+        for future in pending:
+            bot = futures[future]
+            logging.error(f"Bot {bot.username} did not stop before the shutdown deadline, killing its browser")
+            # Pooled browsers are left to browser_pool.close_all below
+            if bot.driver and not isinstance(bot.driver, PooledDriver):
+                kill_driver_processes(bot.driver)
+        return len(done), len(pending)
+
+    def stop_all_bots(self, deadline=None):
+        """Stop the whole fleet within deadline seconds and return a report of how it went"""
+        started = time.monotonic()
+        deadline = TEST_CONFIG["shutdown"]["deadline"] if deadline is None else deadline
+        deadline_at = started + deadline
+        self._stopping = True
+        if self.supervisor:
+            self.supervisor.stop()
+        if self.governor:
+            self.governor.stop()
+        for timer in self._retry_timers:
+            timer.cancel()
+        if self._startup_executor:
+            self._startup_executor.shutdown(wait=False, cancel_futures=True)
+        clean, late = self._teardown(self.bots, deadline_at)
+        if self.scheduler:
+            self.scheduler.shutdown(max(0, min(10, deadline_at - time.monotonic())))
+        # Protocol bots share one event loop and connection pool, which only
+        # exists if protocol_engine was ever imported
+        protocol_engine = sys.modules.get("protocol_engine")
+        if protocol_engine:
+            protocol_engine.ProtocolEngine.close_shared(max(0, min(10, deadline_at - time.monotonic())))
+        browsers_killed = 0
+        if self.browser_pool:
+            browsers_killed = self.browser_pool.close_all(max(0, deadline_at - time.monotonic()))
+        # Anything Chrome-shaped still parented here slipped past every quit
+        orphans_killed = kill_orphan_browsers()
+        self.shutdown_report = {
+            "bots": len(self.bots),
+            "stopped_cleanly": clean,
+            "missed_deadline": late,
+            "browsers_killed": browsers_killed,
+            "orphans_killed": orphans_killed,
+            "deadline": deadline,
+            "seconds": round(time.monotonic() - started, 3)
+        }
+        logging.info(f"Shutdown complete: {json.dumps(self.shutdown_report)}")
+        return self.shutdown_report
 
 if __name__ == "__main__":
+    config_path = os.environ.get("CHATBOT_CONFIG", "chatbot_config.json")
+    live_config.publish(live_config.load(config_path))
     manager = BotManager()
+    if TEST_CONFIG["trace"]["path"]:
+        traces.start_recording(TEST_CONFIG["trace"]["path"], manager.clock)
+    profiling.start()
+    metrics.start_snapshot_writer(TEST_CONFIG["metrics"]["snapshot_path"], TEST_CONFIG["metrics"]["snapshot_interval"])
+    watcher = live_config.ConfigWatcher(manager, config_path)
+    # SIGHUP forces a reload without waiting for the file watcher
+    signal.signal(signal.SIGHUP, lambda signum, frame: watcher.reload())
     try:
         manager.start_all_bots()
+        watcher.start()
         # Keep the main thread running
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
+        watcher.stop()
         manager.stop_all_bots() 
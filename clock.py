@@ -0,0 +1,68 @@
+import time
+from test_config import TEST_CONFIG
+
+
+class RealClock:
+    """Wall-clock time; the default everywhere"""
+
+    speed = 1.0
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def wait(self, event, seconds):
+        """Sleep like sleep() but wake early once event is set; True if it was"""
+        return event.wait(self.to_real(max(0.0, seconds)))
+
+    def to_real(self, seconds):
+        """Real seconds that pass while this clock advances by seconds"""
+        return seconds
+
+
+class AcceleratedClock(RealClock):
+    """Simulated time running speed times faster than the wall clock.
+
+    Bot pacing (typing delays, question intervals, reply pacing, poll pauses)
+    shrinks by the same factor, so a 24h soak at speed 144 takes 10 minutes.
+    Browser and network round-trips still take real time.
+    """
+
+    def __init__(self, speed, start=None):
+        if speed <= 0:
+            raise ValueError("Clock speed must be positive")
+        self.speed = float(speed)
+        self.start = time.time() if start is None else start
+        self.origin = time.monotonic()
+
+    def time(self):
+        return self.start + (time.monotonic() - self.origin) * self.speed
+
+    def sleep(self, seconds):
+        time.sleep(max(0.0, seconds) / self.speed)
+
+    def to_real(self, seconds):
+        return seconds / self.speed
+
+
+def from_config(settings=None):
+    settings = settings or TEST_CONFIG["clock"]
+    return RealClock() if settings["speed"] == 1 else AcceleratedClock(settings["speed"])
+
+
+_clock = None
+
+
+def get():
+    """The process-wide default clock, built from TEST_CONFIG["clock"] on first use"""
+    global _clock
+    if _clock is None:
+        _clock = from_config()
+    return _clock
+
+
+def set_clock(clock):
+    global _clock
+    _clock = clock
@@ -0,0 +1,84 @@
+import itertools
+
+POLICIES = ("round_robin", "oldest_first")
+
+
+class Conversation:
+    """One peer waiting for a reply"""
+
+    def __init__(self, peer, element, waiting_since, order):
+        self.peer = peer
+        self.element = element
+        self.waiting_since = waiting_since
+        self.order = order
+
+
+class ConversationQueue:
+    """Peers with unread messages, served one at a time by a scheduling policy.
+
+    round_robin serves the peer that was replied to longest ago (never-served
+    peers first); oldest_first serves the peer that has been waiting longest.
+    Each peer has its own pacing timer, so a peer that was just answered waits
+    its turn without holding up the others.
+    """
+
+    def __init__(self, policy="round_robin"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown conversation policy {policy!r}, expected one of {', '.join(POLICIES)}")
+        self.policy = policy
+        self.pending = {}
+        self.next_send_at = {}
+        self.last_served = {}
+        self._order = itertools.count()
+
+    def sync(self, unread, now):
+        """Match the queue to the latest unread scan of [{"element", "name"}] rows.
+
+        Rows carry fresh elements each scan; peers no longer listed as unread
+        can't be opened any more and leave the queue.
+        """
+        listed = set()
+        for row in unread:
+            peer = row["name"]
+            if not peer:
+                continue
+            listed.add(peer)
+            conversation = self.pending.get(peer)
+            if conversation:
+                conversation.element = row["element"]
+            else:
+                self.pending[peer] = Conversation(peer, row["element"], now, next(self._order))
+        for peer in list(self.pending):
+            if peer not in listed:
+                del self.pending[peer]
+
+    def _ready(self, now):
+        return [c for c in self.pending.values() if self.next_send_at.get(c.peer, 0) <= now]
+
+    def next_ready(self, now):
+        """The conversation the policy would serve now, or None if every peer is pacing"""
+        ready = self._ready(now)
+        if not ready:
+            return None
+        if self.policy == "oldest_first":
+            return min(ready, key=lambda c: (c.waiting_since, c.order))
+        return min(ready, key=lambda c: (self.last_served.get(c.peer, float("-inf")), c.order))
+
+    def ready_count(self, now):
+        return len(self._ready(now))
+
+    def next_wake(self, now):
+        """Seconds until the next paced peer becomes ready, or None if nothing is waiting"""
+        timers = [self.next_send_at.get(peer, 0) for peer in self.pending]
+        if not timers:
+            return None
+        return max(0.0, min(timers) - now)
+
+    def served(self, peer, now, pace):
+        """Take peer off the queue and hold its next reply back for pace seconds"""
+        self.pending.pop(peer, None)
+        self.last_served[peer] = now
+        self.next_send_at[peer] = now + pace
+
+    def __len__(self):
+        return len(self.pending)
@@ -0,0 +1,99 @@
+import json
+import os
+import random
+from types import MappingProxyType
+from test_config import TEST_CONFIG
+
+# Corpus file format (JSON):
+#   {"responses": [entry, ...],
+#    "topics": {"<topic>": {"questions": [entry, ...]}, ...},
+#    "fallback_question": "..."}
+# where an entry is either a string (weight 1) or {"text": "...", "weight": 2.5}.
+# Topics carry no weight: which topic comes next is the bot's rotation through
+# conversation_settings["conversation_topics"].
+
+
+class AliasTable:
+    """Weighted choice in O(1) per draw (Vose's alias method), built once in O(n)"""
+
+    def __init__(self, items, weights):
+        n = len(items)
+        if n == 0:
+            raise ValueError("AliasTable needs at least one item")
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("AliasTable weights must sum to more than zero")
+        scaled = [weight * n / total for weight in weights]
+        probability = [0.0] * n
+        alias = [0] * n
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1.0 up to rounding error
+        for i in small + large:
+            probability[i] = 1.0
+        self.items = tuple(items)
+        self.probability = tuple(probability)
+        self.alias = tuple(alias)
+
+    def sample(self, rng=random):
+        r = rng.random() * len(self.items)
+        i = int(r)
+        return self.items[i] if r - i < self.probability[i] else self.items[self.alias[i]]
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _entries(raw):
+    texts, weights = [], []
+    for entry in raw:
+        if isinstance(entry, str):
+            texts.append(entry)
+            weights.append(1.0)
+        else:
+            texts.append(entry["text"])
+            weights.append(float(entry.get("weight", 1.0)))
+    return texts, weights
+
+
+class Corpus:
+    """Read-only responses and per-topic questions with weighted sampling"""
+
+    def __init__(self, data):
+        self.responses = AliasTable(*_entries(data["responses"]))
+        questions = {}
+        for topic, spec in data["topics"].items():
+            if spec["questions"]:
+                questions[topic] = AliasTable(*_entries(spec["questions"]))
+        self.questions = MappingProxyType(questions)
+        self.fallback_question = data.get("fallback_question", "Tell me more about yourself.")
+
+    def response(self, rng=random):
+        return self.responses.sample(rng)
+
+    def question(self, topic, rng=random):
+        table = self.questions.get(topic)
+        return table.sample(rng) if table else self.fallback_question
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return Corpus(json.load(f))
+
+
+def _default_path():
+    path = TEST_CONFIG["corpus"]["path"]
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+    return path
+
+
+# Built once per process at import; worker processes forked after import
+# share its pages copy-on-write
+CORPUS = load(_default_path())
@@ -1,4 +1,7 @@
-from flask import Flask
+import json
+from flask import Flask, Response
+from metrics import render_prometheus
+from test_config import TEST_CONFIG
 
 app = Flask(__name__)
 
@@ -6,5 +9,15 @@ app = Flask(__name__)
 def home():
     return "Bot is running!"
 
+@app.route('/metrics')
+def prometheus_metrics():
+    # The bots run in a separate process and periodically snapshot their registry to disk
+    try:
+        with open(TEST_CONFIG["metrics"]["snapshot_path"]) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return Response("# no metrics snapshot yet\n", status=503, mimetype="text/plain")
+    return Response(render_prometheus(snapshot), mimetype="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=10000)
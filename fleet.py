@@ -0,0 +1,309 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+import log_pipeline
+import metrics
+from chat_bots import BotManager, roster_for
+from test_config import TEST_CONFIG
+
+
+# Messages are JSON, never pickles, so a peer can't make us run code by
+# sending crafted data; anything larger than this is refused
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+def _authkey():
+    authkey = TEST_CONFIG["fleet"]["authkey"]
+    if not authkey:
+        raise RuntimeError("FLEET_AUTHKEY must be set to the same secret on every fleet node")
+    return authkey.encode()
+
+
+def _send(conn, message):
+    conn.send_bytes(json.dumps(message).encode())
+
+
+def _recv(conn):
+    return json.loads(conn.recv_bytes(MAX_MESSAGE_BYTES))
+
+
+def _parse_address(value):
+    host, _, port = value.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+class _WorkerHandle:
+    def __init__(self, worker_id, conn):
+        self.worker_id = worker_id
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.assigned = []
+        self.last_heartbeat = time.time()
+        self.status = {}
+        self.metrics = None
+
+    def send(self, message):
+        with self.send_lock:
+            _send(self.conn, message)
+
+
+class FleetCoordinator:
+    """Partitions the roster across worker processes and keeps it balanced"""
+
+    def __init__(self, roster=None, address=None):
+        settings = TEST_CONFIG["fleet"]
+        self.roster = list(roster if roster is not None else roster_for(TEST_CONFIG["test_bots"]))
+        self.address = address or tuple(settings["coordinator_address"])
+        self.heartbeat_timeout = settings["heartbeat_timeout"]
+        self.workers = {}
+        self.lock = threading.Lock()
+        self.listener = None
+        self.running = False
+
+    def serve(self):
+        self.listener = Listener(self.address, authkey=_authkey())
+        self.address = self.listener.address
+        self.running = True
+        threading.Thread(target=self._accept_loop, name="fleet-accept", daemon=True).start()
+        threading.Thread(target=self._watch_heartbeats, name="fleet-heartbeats", daemon=True).start()
+        logging.info(f"Fleet coordinator listening on {self.address[0]}:{self.address[1]}")
+        return self
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                if self.running:
+                    logging.error(f"Fleet coordinator failed to accept worker: {str(e)}")
+                continue
+            threading.Thread(target=self._serve_worker, args=(conn,), daemon=True).start()
+
+    def _serve_worker(self, conn):
+        worker = None
+        try:
+            hello = _recv(conn)
+            worker = _WorkerHandle(hello["worker_id"], conn)
+            with self.lock:
+                self.workers[worker.worker_id] = worker
+            logging.info(f"Fleet worker {worker.worker_id} joined from {hello.get('host')}")
+            self.rebalance()
+            while self.running:
+                message = _recv(conn)
+                if message["type"] == "heartbeat":
+                    worker.last_heartbeat = time.time()
+                    worker.status = message["status"]
+                    worker.metrics = message.get("metrics")
+        except (EOFError, OSError, TypeError, ValueError, KeyError) as e:
+            # TypeError: the heartbeat watcher closed this connection under recv();
+            # ValueError/KeyError: a message that isn't one of ours
+            if worker:
+                logging.error(f"Fleet worker {worker.worker_id} disconnected: {str(e)}")
+        finally:
+            if worker:
+                self._drop_worker(worker.worker_id)
+
+    def _watch_heartbeats(self):
+        while self.running:
+            time.sleep(1)
+            now = time.time()
+            with self.lock:
+                dead = [w.worker_id for w in self.workers.values() if now - w.last_heartbeat > self.heartbeat_timeout]
+            for worker_id in dead:
+                logging.error(f"Fleet worker {worker_id} missed heartbeats, reassigning its bots")
+                self._drop_worker(worker_id)
+
+    def _drop_worker(self, worker_id):
+        with self.lock:
+            worker = self.workers.pop(worker_id, None)
+        if worker is None:
+            return
+        try:
+            worker.conn.close()
+        except OSError:
+            pass
+        self.rebalance()
+
+    def rebalance(self):
+        """Spread the roster evenly, moving as few bots as possible"""
+        with self.lock:
+            workers = sorted(self.workers.values(), key=lambda w: w.worker_id)
+            if not workers:
+                return
+            roster = set(self.roster)
+            for worker in workers:
+                worker.assigned = [entry for entry in worker.assigned if entry in roster]
+            taken = {entry for worker in workers for entry in worker.assigned}
+            orphans = [entry for entry in self.roster if entry not in taken]
+
+            base, extra = divmod(len(self.roster), len(workers))
+            targets = {w.worker_id: base + (1 if i < extra else 0) for i, w in enumerate(workers)}
+            # Shrink overloaded workers first so their surplus can be handed out
+            previous = {w.worker_id: list(w.assigned) for w in workers}
+            for worker in workers:
+                while len(worker.assigned) > targets[worker.worker_id]:
+                    orphans.append(worker.assigned.pop())
+            for worker in workers:
+                while len(worker.assigned) < targets[worker.worker_id] and orphans:
+                    worker.assigned.append(orphans.pop(0))
+            changed = [w for w in workers if w.assigned != previous[w.worker_id]]
+
+        for worker in changed:
+            try:
+                worker.send({"type": "assign", "roster": worker.assigned})
+                logging.info(f"Fleet worker {worker.worker_id} assigned {len(worker.assigned)} bots")
+            except OSError as e:
+                logging.error(f"Failed to send assignment to fleet worker {worker.worker_id}: {str(e)}")
+
+    def status(self):
+        """Aggregated view across all live workers"""
+        now = time.time()
+        with self.lock:
+            workers = {
+                w.worker_id: {
+                    "assigned": len(w.assigned),
+                    "bots": w.status.get("bots", 0),
+                    "active": w.status.get("active", 0),
+                    "heartbeat_age": round(now - w.last_heartbeat, 1)
+                }
+                for w in self.workers.values()
+            }
+        return {
+            "workers": workers,
+            "roster": len(self.roster),
+            "assigned": sum(w["assigned"] for w in workers.values()),
+            "active": sum(w["active"] for w in workers.values())
+        }
+
+    def metrics_snapshot(self):
+        """Every live worker's metrics registry merged into one snapshot"""
+        with self.lock:
+            snapshots = [w.metrics for w in self.workers.values() if w.metrics]
+        return metrics.merge_snapshots(snapshots)
+
+    def shutdown(self):
+        self.running = False
+        with self.lock:
+            workers = list(self.workers.values())
+        for worker in workers:
+            try:
+                worker.send({"type": "shutdown"})
+            except OSError:
+                pass
+        if self.listener:
+            self.listener.close()
+
+
+class FleetWorker:
+    """Runs the bots the coordinator assigns to this process"""
+
+    def __init__(self, coordinator_address, worker_id=None):
+        self.coordinator_address = coordinator_address
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_interval = TEST_CONFIG["fleet"]["heartbeat_interval"]
+        self.manager = None
+
+    def run(self):
+        conn = Client(self.coordinator_address, authkey=_authkey())
+        _send(conn, {"type": "register", "worker_id": self.worker_id, "host": socket.gethostname()})
+        self.manager = BotManager(roster=[])
+        stop_event = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(conn, stop_event),
+                                     name="fleet-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            while True:
+                message = _recv(conn)
+                if message["type"] == "shutdown":
+                    break
+                if message["type"] == "assign":
+                    self.apply_assignment([tuple(entry) for entry in message["roster"]])
+        except (EOFError, OSError, ValueError) as e:
+            logging.error(f"Fleet worker {self.worker_id} lost the coordinator: {str(e)}")
+        finally:
+            stop_event.set()
+            heartbeat.join()
+            self.manager.stop_all_bots()
+            conn.close()
+
+    def _heartbeat(self, conn, stop_event):
+        # Its own thread: retiring bots in apply_assignment can take up to the
+        # shutdown deadline, longer than the coordinator's heartbeat_timeout
+        while True:
+            try:
+                # Workers share a host and a metrics path, so the coordinator
+                # writes the one snapshot flask_app serves
+                _send(conn, {"type": "heartbeat", "status": self.manager.status(),
+                             "metrics": metrics.REGISTRY.snapshot()})
+            except (OSError, ValueError) as e:
+                logging.error(f"Fleet worker {self.worker_id} failed to send a heartbeat: {str(e)}")
+                return
+            if stop_event.wait(self.heartbeat_interval):
+                return
+
+    def apply_assignment(self, roster):
+        # Only bots that were added or removed are started or stopped
+        running = {bot.username for bot in self.manager.bots}
+        wanted = {username for username, _ in roster}
+        removed = running - wanted
+        if removed:
+            self.manager.stop_bots(removed)
+        added = [(username, gender) for username, gender in roster if username not in running]
+        if added:
+            self.manager.start_bots(self.manager.create_bots(added))
+        logging.info(f"Fleet worker {self.worker_id} now runs {len(self.manager.bots)} bots "
+                     f"(+{len(added)}/-{len(removed)})")
+
+
+def _run_worker(address):
+    # A forked worker inherits the queue handler but not the writer thread
+    # behind it, so without a pipeline of its own every record is dropped
+    log_pipeline.configure()
+    FleetWorker(address).run()
+
+
+def run_coordinator(address, spawn=0):
+    coordinator = FleetCoordinator(address=address).serve()
+    processes = []
+    for _ in range(spawn):
+        process = multiprocessing.Process(target=_run_worker, args=(coordinator.address,), daemon=True)
+        process.start()
+        processes.append(process)
+    status_path = TEST_CONFIG["fleet"]["status_path"]
+    try:
+        while True:
+            time.sleep(TEST_CONFIG["fleet"]["heartbeat_interval"])
+            status = coordinator.status()
+            with open(status_path, "w") as f:
+                json.dump(status, f, indent=2)
+            try:
+                metrics.write_snapshot_file(TEST_CONFIG["metrics"]["snapshot_path"], coordinator.metrics_snapshot())
+            except OSError as e:
+                logging.error(f"Failed to write fleet metrics snapshot: {str(e)}")
+            logging.info(f"Fleet status: {status['active']}/{status['roster']} bots active "
+                         f"on {len(status['workers'])} workers")
+    except KeyboardInterrupt:
+        coordinator.shutdown()
+        for process in processes:
+            process.join(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the bot fleet as a coordinator and worker processes")
+    parser.add_argument("role", choices=["coordinator", "worker"])
+    parser.add_argument("--address", default=os.environ.get("FLEET_COORDINATOR"),
+                        help="host:port the coordinator listens on or workers connect to")
+    parser.add_argument("--spawn", type=int, default=0, help="Local worker processes to start (coordinator only)")
+    args = parser.parse_args()
+
+    address = _parse_address(args.address) if args.address else tuple(TEST_CONFIG["fleet"]["coordinator_address"])
+    if args.role == "coordinator":
+        run_coordinator(address, args.spawn)
+    else:
+        _run_worker(address)
@@ -0,0 +1,193 @@
+import logging
+import threading
+from collections import deque
+import psutil
+import metrics
+from browser_pool import PooledDriver, driver_rss_mb
+from test_config import TEST_CONFIG
+
+MB = 1024 * 1024
+
+
+class ResourceGovernor:
+    """Holds the fleet at the bot count the host can sustain.
+
+    Each check samples host CPU, available memory and the RSS of the bots'
+    Chrome processes, and turns them into a capacity estimate: how many bots
+    fit before CPU reaches cpu_admit_percent or available memory falls to
+    memory_reserve_mb. New bots start only while the fleet is below that
+    estimate; the others wait and are started, in order, as headroom
+    appears. When memory drops under the reserve, or CPU stays above
+    cpu_shed_percent for shed_after checks, the newest running bot is paused
+    (its Chrome quit) and queued to resume first once there is room again.
+    """
+
+    def __init__(self, manager, settings=None):
+        self.manager = manager
+        # None follows TEST_CONFIG, so live config changes apply on the next check
+        self._settings = settings
+        self.waiting = deque()
+        self.lock = threading.Lock()
+        self.capacity = None
+        self.cpu_percent = None
+        self.available_mb = None
+        self.bot_rss_mb = None
+        # Bots admitted since the last sample, not yet visible in its numbers
+        self.reserved = set()
+        self.hot_checks = 0
+        self.paused = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+        # The first cpu_percent(None) call only sets the baseline
+        psutil.cpu_percent(interval=None)
+
+    @property
+    def settings(self):
+        return self._settings or TEST_CONFIG["governor"]
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="bot-governor", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        while not self.stop_event.wait(self.settings["check_interval"]):
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"Governor check failed: {str(e)}")
+
+    def running(self):
+        """Browser bots holding resources, oldest first; protocol bots are not governed"""
+        return [
+            bot for bot in self.manager.bots
+            if bot.uses_browser and not bot.stopped and (bot.driver is not None or bot.is_active)
+        ]
+
+    def measure_bot_rss(self, running):
+        """Mean Chrome RSS per running bot in MB, or None before any Chrome can be measured"""
+        total, measured = 0.0, 0
+        pooled = 0
+        for bot in running:
+            if isinstance(bot.driver, PooledDriver):
+                pooled += 1
+            elif bot.driver is not None:
+                rss = driver_rss_mb(bot.driver)
+                if rss:
+                    total += rss
+                    measured += 1
+        pool = self.manager.browser_pool
+        if pool and pooled:
+            # Pooled bots split their shared browsers' memory between them
+            total += sum(driver_rss_mb(browser.driver) for browser in list(pool.browsers) if browser.driver)
+            measured += pooled
+        return total / measured if measured and total else None
+
+    def sample(self):
+        """Refresh the host readings and the capacity estimate"""
+        settings = self.settings
+        running = self.running()
+        cpu = psutil.cpu_percent(interval=None)
+        available = psutil.virtual_memory().available / MB
+        measured = self.measure_bot_rss(running)
+        bot_rss = measured or self.bot_rss_mb or settings["bot_rss_mb"]
+
+        memory_fit = int((available - settings["memory_reserve_mb"]) // bot_rss)
+        if running and cpu > 0:
+            cpu_fit = int((settings["cpu_admit_percent"] - cpu) // (cpu / len(running)))
+        else:
+            cpu_fit = memory_fit if cpu < settings["cpu_admit_percent"] else 0
+        capacity = max(settings["min_bots"], len(running) + min(memory_fit, cpu_fit))
+        if settings["max_bots"] is not None:
+            capacity = min(capacity, settings["max_bots"])
+
+        with self.lock:
+            self.cpu_percent = cpu
+            self.available_mb = available
+            self.bot_rss_mb = bot_rss
+            self.capacity = capacity
+            self.reserved = set()
+        return running
+
+    def admit(self, bot):
+        """Whether bot may start now; if not it waits for headroom and is started later"""
+        if not bot.uses_browser:
+            return True
+        if self.capacity is None:
+            self.sample()
+        running = self.running()
+        with self.lock:
+            if len(self.reserved.union(running, [bot])) <= self.capacity:
+                self.reserved.add(bot)
+                return True
+            if bot not in self.waiting:
+                self.waiting.append(bot)
+        metrics.GOVERNOR_ACTIONS.inc(action="deferred")
+        logging.info(f"Governor deferring {bot.username}: {len(running)} bots running, capacity {self.capacity}")
+        return False
+
+    def forget(self, bots):
+        """Drop bots leaving the fleet from the waiting queue"""
+        with self.lock:
+            for bot in bots:
+                if bot in self.waiting:
+                    self.waiting.remove(bot)
+
+    def check(self):
+        settings = self.settings
+        running = self.sample()
+        overloaded = self.cpu_percent >= settings["cpu_shed_percent"]
+        self.hot_checks = self.hot_checks + 1 if overloaded else 0
+        if self.available_mb < settings["memory_reserve_mb"]:
+            self.pause_newest(running, f"{self.available_mb:.0f} MB available")
+        elif self.hot_checks >= settings["shed_after"]:
+            self.pause_newest(running, f"CPU at {self.cpu_percent:.0f}% for {self.hot_checks} checks")
+        elif not self.hot_checks:
+            self.resume_waiting(running)
+
+    def pause_newest(self, running, reason):
+        """Quit the most recently added running bot's browser and queue it to resume later"""
+        self.hot_checks = 0
+        if len(running) <= self.settings["min_bots"]:
+            return None
+        bot = running[-1]
+        logging.warning(f"Governor pausing {bot.username}: {reason}")
+        bot.paused = True
+        with self.lock:
+            self.waiting.appendleft(bot)
+            self.paused += 1
+        bot.stop_driver(TEST_CONFIG["shutdown"]["quit_timeout"])
+        metrics.GOVERNOR_ACTIONS.inc(action="paused")
+        return bot
+
+    def resume_waiting(self, running):
+        """Start as many waiting bots as the capacity estimate has room for"""
+        with self.lock:
+            room = self.capacity - len(self.reserved.union(running))
+            resumed = []
+            while self.waiting and room > 0:
+                resumed.append(self.waiting.popleft())
+                room -= 1
+        if resumed and not self.manager._stopping:
+            logging.info(f"Governor starting {len(resumed)} waiting bots, capacity {self.capacity}")
+            metrics.GOVERNOR_ACTIONS.inc(len(resumed), action="resumed")
+            self.manager.resume_bots(resumed)
+        return resumed
+
+    def status(self):
+        with self.lock:
+            return {
+                "capacity": self.capacity,
+                "running": len(self.running()),
+                "waiting": len(self.waiting),
+                "paused_total": self.paused,
+                "cpu_percent": self.cpu_percent,
+                "available_mb": None if self.available_mb is None else round(self.available_mb),
+                "bot_rss_mb": None if self.bot_rss_mb is None else round(self.bot_rss_mb)
+            }
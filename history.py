@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+
+class ConversationHistory:
+    """Messages a bot has already handled, keyed by (peer, message id, text hash).
+
+    Each peer keeps an insertion-ordered window of at most ``window`` keys, so
+    membership checks are O(1) and memory stays bounded on long runs. Keys
+    pushed out of a window are appended to ``compact_path`` (JSON lines) when
+    set, which keeps a full record on disk without keeping it in memory.
+
+    Positional ids (a message's index on the page, used when the page has no
+    ids of its own) are also checked against a per-peer high-water mark: the
+    whole conversation is re-read on every visit, so a position that has
+    been pushed out of the window must not count as new again. align() moves
+    the mark with the last message it covers when the page trims or resets
+    the conversation, so later messages don't hide below a stale mark.
+    """
+
+    def __init__(self, window=500, compact_path=None):
+        self.window = window
+        self.compact_path = compact_path
+        self.peers = {}
+        self.positions = {}
+        # Text digest of the message at each peer's high-water mark
+        self.tails = {}
+        self.evicted = 0
+        if compact_path:
+            os.makedirs(os.path.dirname(compact_path) or ".", exist_ok=True)
+
+    @staticmethod
+    def digest(text):
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+    @classmethod
+    def key(cls, peer, message_id, text):
+        return (peer, message_id, cls.digest(text))
+
+    def align(self, peer, messages):
+        """Re-anchor peer's high-water mark on a fresh read of its (position, text) messages.
+
+        When the message at the mark is no longer the last one seen, the page
+        dropped messages before it: the mark moves down to wherever that
+        message is now, or is cleared if it is gone (the chat was reset) so
+        everything on the page counts as new.
+        """
+        mark = self.positions.get(peer)
+        if mark is None:
+            return
+        tail = self.tails.get(peer)
+        digests = {position: self.digest(text) for position, text in messages}
+        if digests.get(mark) == tail:
+            return
+        for position in sorted((p for p in digests if p < mark), reverse=True):
+            if digests[position] == tail:
+                self.positions[peer] = position
+                return
+        del self.positions[peer]
+        self.tails.pop(peer, None)
+
+    def add(self, peer, message_id, text, positional=False):
+        """Record a message; returns False if it was already seen"""
+        key = self.key(peer, message_id, text)
+        seen = self.peers.setdefault(peer, OrderedDict())
+        if positional:
+            # The mark alone decides: after align() moves it, a new message
+            # can land on a position and text a trimmed-away one had
+            if message_id <= self.positions.get(peer, -1):
+                return False
+            self.positions[peer] = message_id
+            self.tails[peer] = key[2]
+        elif key in seen:
+            return False
+        seen[key] = text
+        if self.window and len(seen) > self.window:
+            self._evict(seen, len(seen) - self.window)
+        return True
+
+    def __contains__(self, item):
+        peer, message_id, text = item
+        return self.key(peer, message_id, text) in self.peers.get(peer, ())
+
+    def __len__(self):
+        return sum(len(seen) for seen in self.peers.values())
+
+    def _evict(self, seen, count):
+        evicted = [seen.popitem(last=False) for _ in range(count)]
+        self.evicted += count
+        if self.compact_path:
+            with open(self.compact_path, "a") as f:
+                for (peer, message_id, digest), text in evicted:
+                    f.write(json.dumps({"peer": peer, "id": message_id, "hash": digest, "text": text}) + "\n")
@@ -0,0 +1,248 @@
+import copy
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+from dotenv import dotenv_values
+from test_config import TEST_CONFIG
+
+# Pristine defaults; also the schema overrides are validated against
+DEFAULTS = copy.deepcopy(TEST_CONFIG)
+
+# Maps whose keys are data (usernames, sample keys) rather than settings
+OPEN_MAPS = {("engine", "per_bot"), ("logging", "sample_rates")}
+
+# Settings limited to a fixed set of values
+CHOICES = {
+    ("engine", "default"): ("selenium", "protocol"),
+    ("scheduler", "mode"): ("threads", "asyncio"),
+    ("event_detection", "mode"): ("poll", "push"),
+    ("conversations", "policy"): ("round_robin", "oldest_first")
+}
+
+# Sections read once at startup (or captured by a long-lived object, like the
+# supervisor's settings or the protocol engine's); changes are stored but
+# need a restart. A new section belongs here unless it is re-read on use.
+RESTART_SECTIONS = {
+    "browser_pool", "scheduler", "fleet", "metrics", "logging", "sessions", "profiling",
+    "supervisor", "startup", "history", "corpus", "clock", "protocol_engine", "trace"
+}
+
+# CHATBOT__CONVERSATION_SETTINGS__QUESTION_INTERVAL=10 overrides
+# TEST_CONFIG["conversation_settings"]["question_interval"]
+ENV_PREFIX = "CHATBOT__"
+
+
+def freeze(value):
+    """Read-only copy: dicts become mappingproxies and lists become tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value, like=None):
+    """Mutable copy of a frozen value, keeping tuples where the default (like) has one"""
+    if isinstance(value, MappingProxyType):
+        like = like if isinstance(like, dict) else {}
+        return {key: thaw(item, like.get(key)) for key, item in value.items()}
+    if isinstance(value, tuple):
+        items = [thaw(item) for item in value]
+        return tuple(items) if isinstance(like, tuple) else items
+    return value
+
+
+def merge(base, overrides):
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _type_errors(value, default, path):
+    where = ".".join(path)
+    if default is None:
+        return []
+    if isinstance(default, dict):
+        if not isinstance(value, dict):
+            return [f"{where}: expected a mapping"]
+        if tuple(path) in OPEN_MAPS or not default:
+            return []
+        errors = []
+        for key, item in value.items():
+            if key not in default:
+                errors.append(f"{where}.{key}: unknown setting" if path else f"{key}: unknown setting")
+            else:
+                errors += _type_errors(item, default[key], path + [key])
+        return errors
+    if isinstance(default, bool):
+        return [] if isinstance(value, bool) else [f"{where}: expected true or false"]
+    if isinstance(default, (int, float)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return [f"{where}: expected a number"]
+        if value < 0:
+            return [f"{where}: must not be negative"]
+        return []
+    if isinstance(default, (list, tuple)):
+        if not isinstance(value, (list, tuple)):
+            return [f"{where}: expected a list"]
+        # (low, high) ranges such as response_delay
+        if isinstance(default, tuple) and len(default) == 2 and all(isinstance(x, (int, float)) for x in default):
+            if len(value) != 2 or not all(isinstance(x, (int, float)) for x in value) or value[0] > value[1]:
+                return [f"{where}: expected [low, high]"]
+        return []
+    if not isinstance(value, type(default)):
+        return [f"{where}: expected {type(default).__name__}"]
+    return []
+
+
+def validate(config):
+    """Raise ValueError listing every setting that does not match the defaults' types"""
+    errors = _type_errors(config, DEFAULTS, [])
+    for (section, key), allowed in CHOICES.items():
+        value = config.get(section, {}).get(key)
+        if value not in allowed:
+            errors.append(f"{section}.{key}: expected one of {', '.join(allowed)}")
+    if errors:
+        raise ValueError("Invalid config: " + "; ".join(errors))
+
+
+def _parse_env_value(raw):
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def env_overrides(environ, dotenv_path=".env"):
+    """Overrides from CHATBOT__* variables; a .env file fills in anything not set in environ"""
+    values = {key: value for key, value in dotenv_values(dotenv_path).items() if value is not None}
+    values.update(environ)
+    overrides = {}
+    for name, raw in values.items():
+        if not name.startswith(ENV_PREFIX):
+            continue
+        path = name[len(ENV_PREFIX):].lower().split("__")
+        target = overrides
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = _parse_env_value(raw)
+    return overrides
+
+
+def file_overrides(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+class ConfigSnapshot:
+    """One validated, read-only view of the whole config"""
+
+    def __init__(self, data, version):
+        self.data = freeze(data)
+        self.version = version
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def changed_sections(self, other):
+        return {key for key in self.data if self.data[key] != other.data.get(key)}
+
+
+_lock = threading.Lock()
+# None until the first reload; until then TEST_CONFIG itself is the source
+_current = None
+
+
+def load(path=None, environ=None, dotenv_path=".env"):
+    """Defaults, then the JSON file, then the environment; validated into a new snapshot"""
+    environ = os.environ if environ is None else environ
+    config = merge(DEFAULTS, file_overrides(path))
+    config = merge(config, env_overrides(environ, dotenv_path))
+    validate(config)
+    return ConfigSnapshot(config, current().version + 1)
+
+
+def current():
+    snapshot = _current
+    if snapshot is None:
+        # Taken fresh so edits made to TEST_CONFIG before startup are seen
+        snapshot = ConfigSnapshot(TEST_CONFIG, 0)
+    return snapshot
+
+
+def publish(snapshot):
+    """Make snapshot current and mirror it into TEST_CONFIG; returns the sections that changed"""
+    global _current
+    with _lock:
+        previous = current()
+        changed = snapshot.changed_sections(previous)
+        for section in changed:
+            # One assignment per section, so readers see a whole old or new section
+            TEST_CONFIG[section] = thaw(snapshot[section], DEFAULTS.get(section))
+        _current = snapshot
+    return changed
+
+
+class ConfigWatcher:
+    """Reloads the config file and .env when they change and pushes the result to a BotManager"""
+
+    def __init__(self, manager, path=None, dotenv_path=".env", interval=5):
+        self.manager = manager
+        self.path = path
+        self.dotenv_path = dotenv_path
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self._mtimes = self._read_mtimes()
+
+    def _read_mtimes(self):
+        mtimes = []
+        for path in (self.path, self.dotenv_path):
+            try:
+                mtimes.append(os.stat(path).st_mtime)
+            except (OSError, TypeError):
+                mtimes.append(None)
+        return mtimes
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            mtimes = self._read_mtimes()
+            if mtimes != self._mtimes:
+                self._mtimes = mtimes
+                self.reload()
+
+    def reload(self):
+        """Load, validate and apply; an invalid config is logged and the running one kept"""
+        try:
+            snapshot = load(self.path, dotenv_path=self.dotenv_path)
+        except (OSError, ValueError) as e:
+            logging.error(f"Config reload rejected, keeping version {current().version}: {str(e)}")
+            return None
+        previous = current()
+        changed = publish(snapshot)
+        if not changed:
+            return snapshot
+        logging.info(f"Config version {snapshot.version} applied, changed: {', '.join(sorted(changed))}")
+        restart_only = changed & RESTART_SECTIONS
+        if restart_only:
+            logging.warning(f"Config sections {', '.join(sorted(restart_only))} take effect after a restart")
+        self.manager.apply_config(snapshot, previous, changed)
+        return snapshot
@@ -0,0 +1,216 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, RotatingFileHandler
+from test_config import TEST_CONFIG
+
+# LogRecord attributes that are not user-supplied context
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra= fields such as bot and peer become keys"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key != "sample":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """Rotates when the file passes max_bytes or is older than interval seconds.
+
+    emit() never flushes; the pipeline listener flushes once per batch.
+    """
+
+    def __init__(self, filename, max_bytes=0, backup_count=0, interval=0):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.interval = interval
+        self.rollover_at = time.time() + interval if interval else None
+
+    def shouldRollover(self, record):
+        if self.rollover_at and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        if self.interval:
+            self.rollover_at = time.time() + self.interval
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of records tagged with extra={"sample": key}"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        key = getattr(record, "sample", None)
+        if key is None or key not in self.rates:
+            return True
+        return random.random() < self.rates[key]
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener without formatting or waiting.
+
+    Formatting happens on the listener thread, and a full queue drops the
+    record instead of blocking the bot that logged it.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Same-process queue: no pickling, so the record is passed untouched
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingListener:
+    """Drains the log queue on one thread and flushes handlers once per batch"""
+
+    def __init__(self, log_queue, handlers, batch_size=256, flush_interval=0.5):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.thread = None
+        self._stop = object()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        running = True
+        while running:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for record in batch:
+                if record is self._stop:
+                    running = False
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            for handler in self.handlers:
+                handler.flush()
+
+    def stop(self):
+        # A forked child inherits the listener but not its thread; the
+        # parent still drains that queue, so there is nothing to stop here
+        if self.thread and self.thread.is_alive():
+            # Blocking put so the stop marker is never dropped
+            self.queue.put(self._stop)
+            self.thread.join()
+            self.thread = None
+        for handler in self.handlers:
+            handler.close()
+
+
+class BotLogger(logging.LoggerAdapter):
+    """Adds the bot's username to every record, merged with any per-call extra="""
+
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return msg, kwargs
+
+
+def bot_logger(username):
+    return BotLogger(logging.getLogger("chatbot"), {"bot": username})
+
+
+_listener = None
+_queue_handler = None
+
+
+def configure(settings=None, console=False):
+    """Route the root logger through the queue pipeline; safe to call more than once"""
+    global _listener, _queue_handler
+    settings = settings or TEST_CONFIG["logging"]
+    shutdown()
+
+    if settings["json"]:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(settings["format"])
+    file_handler = SizeAndTimeRotatingFileHandler(
+        settings["filename"],
+        max_bytes=settings["max_bytes"],
+        backup_count=settings["backup_count"],
+        interval=settings["rotate_interval"]
+    )
+    handlers = [file_handler]
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(settings["queue_size"])
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(settings["sample_rates"]))
+    _listener = BatchingListener(log_queue, handlers, settings["batch_size"], settings["flush_interval"]).start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(getattr(logging, settings["level"]))
+    atexit.register(shutdown)
+
+
+def dropped():
+    return _queue_handler.dropped if _queue_handler else 0
+
+
+def shutdown():
+    """Write out everything still queued; called at exit and before reconfiguring"""
+    global _listener, _queue_handler
+    if _queue_handler:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener:
+        _listener.stop()
+        _listener = None
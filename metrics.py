@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histograms use HDR-style log-linear buckets over microseconds: exact below
+# 16us, then 16 linear sub-buckets per power of two (about 6% relative error),
+# so recording is O(1) and memory is bounded no matter how many samples arrive.
+SUB_BUCKETS = 16
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def _bucket_index(seconds):
+    micros = max(0, int(seconds * 1000000))
+    if micros < SUB_BUCKETS:
+        return micros
+    shift = micros.bit_length() - 5
+    return SUB_BUCKETS * (shift + 1) + (micros >> shift) - SUB_BUCKETS
+
+
+def _bucket_upper(index):
+    """Upper bound of a bucket in seconds"""
+    if index < SUB_BUCKETS:
+        return (index + 1) / 1000000.0
+    shift = index // SUB_BUCKETS - 1
+    mantissa = SUB_BUCKETS + index % SUB_BUCKETS
+    return ((mantissa + 1) << shift) / 1000000.0
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _labels_key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def snapshot(self):
+        with self.lock:
+            series = [{"labels": dict(key), "value": value} for key, value in self.series.items()]
+        return {"type": "counter", "help": self.help, "series": series,
+                "total": sum(s["value"] for s in series)}
+
+
+class Histogram:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = _labels_key(labels)
+        index = _bucket_index(seconds)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"count": 0, "sum": 0.0, "min": seconds, "max": seconds, "buckets": {}}
+            series["count"] += 1
+            series["sum"] += seconds
+            series["min"] = min(series["min"], seconds)
+            series["max"] = max(series["max"], seconds)
+            series["buckets"][index] = series["buckets"].get(index, 0) + 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        with self.lock:
+            series = [dict(_copy_series(value), labels=dict(key)) for key, value in self.series.items()]
+        total = {"count": 0, "sum": 0.0, "min": None, "max": None, "buckets": {}}
+        for s in series:
+            _merge_series(total, s)
+        return {"type": "histogram", "help": self.help, "series": series, "total": total}
+
+
+def _copy_series(series):
+    # JSON object keys are strings; bucket indexes are restored by percentile()
+    return {"count": series["count"], "sum": series["sum"], "min": series["min"], "max": series["max"],
+            "buckets": {str(index): count for index, count in series["buckets"].items()}}
+
+
+def _merge_series(total, series):
+    total["count"] += series["count"]
+    total["sum"] += series["sum"]
+    total["min"] = series["min"] if total["min"] is None else min(total["min"], series["min"])
+    total["max"] = series["max"] if total["max"] is None else max(total["max"], series["max"])
+    for index, count in series["buckets"].items():
+        total["buckets"][index] = total["buckets"].get(index, 0) + count
+
+
+def percentile(series, quantile):
+    """Quantile (0-1) of a snapshotted histogram series, in seconds"""
+    if not series["count"]:
+        return None
+    rank = quantile * series["count"]
+    seen = 0
+    for index in sorted(int(i) for i in series["buckets"]):
+        seen += series["buckets"][str(index)]
+        if seen >= rank:
+            return min(_bucket_upper(index), series["max"])
+    return series["max"]
+
+
+class MetricsRegistry:
+    """In-process registry of counters and latency histograms"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text))
+
+    def histogram(self, name, help_text):
+        return self._register(Histogram(name, help_text))
+
+    def _register(self, metric):
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def snapshot(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {"timestamp": time.time(), "metrics": {m.name: m.snapshot() for m in metrics}}
+
+    def write_snapshot(self, path):
+        write_snapshot_file(path, self.snapshot())
+
+
+def write_snapshot_file(path, snapshot):
+    # Write then rename so readers never see a partial file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def merge_snapshots(snapshots):
+    """One registry snapshot out of several processes' (fleet workers'): series with equal labels are summed"""
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot["metrics"].items():
+            target = merged.setdefault(name, {"type": metric["type"], "help": metric["help"], "series": {}})
+            for series in metric["series"]:
+                key = _labels_key(series["labels"])
+                if metric["type"] == "counter":
+                    current = target["series"].setdefault(key, {"labels": series["labels"], "value": 0})
+                    current["value"] += series["value"]
+                    continue
+                current = target["series"].get(key)
+                if current is None:
+                    current = target["series"][key] = {"labels": series["labels"], "count": 0, "sum": 0.0,
+                                                       "min": None, "max": None, "buckets": {}}
+                _merge_series(current, series)
+    metrics = {}
+    for name, metric in merged.items():
+        series = list(metric["series"].values())
+        if metric["type"] == "counter":
+            metrics[name] = dict(metric, series=series, total=sum(s["value"] for s in series))
+            continue
+        total = {"count": 0, "sum": 0.0, "min": None, "max": None, "buckets": {}}
+        for s in series:
+            _merge_series(total, s)
+        metrics[name] = dict(metric, series=series, total=total)
+    return {"timestamp": max((s["timestamp"] for s in snapshots), default=time.time()), "metrics": metrics}
+
+
+def render_prometheus(snapshot):
+    """Prometheus text exposition of a registry snapshot.
+
+    Histograms are exported as summaries: per-series quantiles plus a
+    fleet-wide series without labels, since quantiles cannot be summed.
+    """
+    lines = []
+    for name, metric in sorted(snapshot["metrics"].items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        if metric["type"] == "counter":
+            lines.append(f"# TYPE {name} counter")
+            for series in metric["series"]:
+                lines.append(f"{name}{_format_labels(series['labels'])} {series['value']}")
+            continue
+        lines.append(f"# TYPE {name} summary")
+        for series in metric["series"] + [dict(metric["total"], labels={})]:
+            if not series["count"]:
+                continue
+            for quantile in QUANTILES:
+                labels = dict(series["labels"], quantile=str(quantile))
+                lines.append(f"{name}{_format_labels(labels)} {percentile(series, quantile)}")
+            lines.append(f"{name}_sum{_format_labels(series['labels'])} {series['sum']}")
+            lines.append(f"{name}_count{_format_labels(series['labels'])} {series['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def start_snapshot_writer(path, interval, registry=None):
+    """Periodically dump the registry to path for out-of-process readers such as flask_app"""
+    registry = registry or REGISTRY
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                registry.write_snapshot(path)
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=run, name="metrics-snapshot", daemon=True)
+    thread.start()
+    return thread
+
+
+REGISTRY = MetricsRegistry()
+
+LOGIN_SECONDS = REGISTRY.histogram("chatbot_login_seconds", "Time to log a bot in")
+LOGINS = REGISTRY.counter("chatbot_logins_total", "Login attempts by result")
+SCAN_SECONDS = REGISTRY.histogram("chatbot_unread_scan_seconds", "Bell click and unread-user scan time")
+EXTRACT_SECONDS = REGISTRY.histogram("chatbot_message_extract_seconds", "Time to read an open conversation")
+SEND_SECONDS = REGISTRY.histogram("chatbot_send_seconds", "Time to type and send one reply")
+REPLY_SECONDS = REGISTRY.histogram("chatbot_reply_seconds", "Time from reading a message to replying")
+REPLY_LATENCY_SECONDS = REGISTRY.histogram(
+    "chatbot_reply_latency_seconds", "Time from message arrival event to reply (push mode)"
+)
+ARRIVAL_REPLY_SECONDS = REGISTRY.histogram(
+    "chatbot_arrival_to_reply_seconds", "Time from a peer first showing as unread to the reply, in bot clock seconds"
+)
+MESSAGES_RECEIVED = REGISTRY.counter("chatbot_messages_received_total", "New messages seen")
+MESSAGES_SENT = REGISTRY.counter("chatbot_messages_sent_total", "Replies sent")
+CYCLES = REGISTRY.counter("chatbot_monitor_cycles_total", "monitor_chat cycles completed")
+RESTARTS = REGISTRY.counter("chatbot_restarts_total", "Supervisor restarts by result")
+GOVERNOR_ACTIONS = REGISTRY.counter("chatbot_governor_actions_total", "Bots deferred, paused and resumed by the resource governor")
+WEBDRIVER_SECONDS = REGISTRY.histogram("chatbot_webdriver_command_seconds", "WebDriver round-trip time by command (profiling only)")
+SELECTOR_LOOKUPS = REGISTRY.counter("chatbot_selector_lookups_total", "Element lookups by selector and result")
+SELECTOR_SECONDS = REGISTRY.histogram("chatbot_selector_seconds", "Time spent waiting for an element by selector")
@@ -0,0 +1,316 @@
+import argparse
+import itertools
+import logging
+import random
+import threading
+import time
+from flask import Flask, jsonify, make_response, redirect, request
+from werkzeug.serving import make_server
+
+# Markup mirrors the selectors ChatBot.login and ChatBot.monitor_chat rely on.
+# Only messages from the peer are rendered as div.chat-message; the bot's own
+# replies use div.own-message so they are never mistaken for new messages.
+LOGIN_PAGE = """<!doctype html>
+<html><body>
+<form method="post" action="/login">
+  <input name="username" type="text">
+  <select name="gender"><option value="male">Male</option><option value="female">Female</option></select>
+  <input name="age" type="number">
+  <button type="submit">Start chatting</button>
+</form>
+</body></html>"""
+
+CHAT_PAGE = """<!doctype html>
+<html><body>
+<div class="chat-container">
+  <div class="relative">
+    <button class="p-2 text-gray-600" id="bell">&#128276;<span class="unread-count">0</span></button>
+    <div id="dropdown"></div>
+  </div>
+  <div id="chat-window" style="display:none">
+    <div id="messages"></div>
+    <input type="text" placeholder="Type your message" id="message-input">
+    <button class="send-button" id="send">Send</button>
+  </div>
+</div>
+<script>
+const POLL_MS = %(poll_ms)d;
+let openPeer = null;
+let lastSeen = 0;
+const DROPDOWN = "absolute right-0 mt-2 w-64 bg-white rounded-lg shadow-lg py-1 z-50 border border-gray-200";
+
+function renderMessages(messages) {
+  const box = document.getElementById("messages");
+  box.innerHTML = "";
+  for (const m of messages) {
+    const div = document.createElement("div");
+    div.className = m.from_bot ? "own-message" : "chat-message";
+    div.dataset.messageId = m.id;
+    div.textContent = m.text;
+    box.appendChild(div);
+  }
+}
+
+async function openChat(peer) {
+  openPeer = peer;
+  document.getElementById("dropdown").innerHTML = "";
+  const resp = await fetch("/api/messages?peer=" + encodeURIComponent(peer));
+  renderMessages((await resp.json()).messages);
+  document.getElementById("chat-window").style.display = "block";
+}
+
+document.getElementById("bell").addEventListener("click", async () => {
+  const dropdown = document.getElementById("dropdown");
+  if (dropdown.innerHTML) { dropdown.innerHTML = ""; return; }
+  const resp = await fetch("/api/unread");
+  const peers = (await resp.json()).unread;
+  if (!peers.length) return;
+  const panel = document.createElement("div");
+  panel.className = DROPDOWN;
+  for (const peer of peers) {
+    const row = document.createElement("div");
+    row.className = "px-4 py-3";
+    const name = document.createElement("span");
+    name.className = "font-medium text-gray-900";
+    name.textContent = peer;
+    row.appendChild(name);
+    row.addEventListener("click", () => openChat(peer));
+    panel.appendChild(row);
+  }
+  dropdown.appendChild(panel);
+});
+
+async function send() {
+  const input = document.getElementById("message-input");
+  if (!openPeer || !input.value) return;
+  await fetch("/api/send", {method: "POST", headers: {"Content-Type": "application/json"},
+                            body: JSON.stringify({peer: openPeer, text: input.value})});
+  input.value = "";
+  const resp = await fetch("/api/messages?peer=" + encodeURIComponent(openPeer));
+  renderMessages((await resp.json()).messages);
+}
+document.getElementById("send").addEventListener("click", send);
+document.getElementById("message-input").addEventListener("keydown", (e) => { if (e.key === "Enter") send(); });
+
+// Keep the badge and the open conversation live so DOM observers see new traffic
+setInterval(async () => {
+  const resp = await fetch("/api/poll?since=" + lastSeen);
+  const data = await resp.json();
+  const badge = document.querySelector(".unread-count");
+  if (badge.textContent !== String(data.unread_count)) badge.textContent = data.unread_count;
+  if (data.last_id > lastSeen) {
+    lastSeen = data.last_id;
+    if (openPeer) {
+      const msgs = await fetch("/api/messages?peer=" + encodeURIComponent(openPeer));
+      renderMessages((await msgs.json()).messages);
+    }
+  }
+}, POLL_MS);
+</script>
+</body></html>"""
+
+
+class MockChatServer:
+    """Local stand-in for ChatSafari with hooks to inject message traffic"""
+
+    def __init__(self, host="127.0.0.1", port=0, poll_ms=500):
+        self.host = host
+        self.port = port
+        self.poll_ms = poll_ms
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.last_id = 0
+        self.users = {}
+        self.conversations = {}
+        self.unread = {}
+        self.pending = {}
+        self.latencies = []
+        self.injected = 0
+        self.replies = 0
+        self.reply_hooks = []
+        self.app = self._build_app()
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self.server = make_server(self.host, self.port, self.app, threaded=True)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, name="mock-chat-server", daemon=True)
+        self.thread.start()
+        logging.info(f"Mock chat server listening on {self.url}")
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server = None
+
+    def inject_message(self, bot, peer, text):
+        """Deliver a message from peer to bot as if a real user had sent it"""
+        with self.lock:
+            message = self._append(bot, peer, text, from_bot=False)
+            unread = self.unread.setdefault(bot, [])
+            if peer not in unread:
+                unread.append(peer)
+            self.pending.setdefault((bot, peer), []).append(message["ts"])
+            self.injected += 1
+            return message["id"]
+
+    def on_reply(self, hook):
+        """Register hook(bot, peer, text, latency) called for every bot reply"""
+        self.reply_hooks.append(hook)
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            return {
+                "logged_in": len(self.users),
+                "injected": self.injected,
+                "replies": self.replies,
+                "unanswered": sum(len(v) for v in self.pending.values()),
+                "reply_latency_p50": _percentile(latencies, 50),
+                "reply_latency_p95": _percentile(latencies, 95),
+                "reply_latency_max": latencies[-1] if latencies else None
+            }
+
+    def _append(self, bot, peer, text, from_bot):
+        message = {"id": next(self.ids), "text": text, "from_bot": from_bot, "ts": time.time()}
+        self.conversations.setdefault(bot, {}).setdefault(peer, []).append(message)
+        self.last_id = message["id"]
+        return message
+
+    def _record_reply(self, bot, peer, text):
+        with self.lock:
+            self._append(bot, peer, text, from_bot=True)
+            self.replies += 1
+            waiting = self.pending.pop((bot, peer), [])
+            latency = time.time() - waiting[0] if waiting else None
+            if latency is not None:
+                self.latencies.append(latency)
+        for hook in self.reply_hooks:
+            hook(bot, peer, text, latency)
+
+    def _build_app(self):
+        app = Flask("mock_chat_server")
+
+        @app.route("/", methods=["GET"])
+        def login_page():
+            return LOGIN_PAGE
+
+        @app.route("/login", methods=["POST"])
+        def login():
+            username = request.form.get("username", "")
+            with self.lock:
+                self.users[username] = {"gender": request.form.get("gender"), "age": request.form.get("age")}
+            resp = make_response(redirect("/chat"))
+            resp.set_cookie("user", username)
+            return resp
+
+        @app.route("/chat")
+        def chat():
+            if request.cookies.get("user") not in self.users:
+                return redirect("/")
+            return CHAT_PAGE % {"poll_ms": self.poll_ms}
+
+        @app.route("/api/unread")
+        def unread():
+            with self.lock:
+                return jsonify(unread=list(self.unread.get(request.cookies.get("user"), [])))
+
+        @app.route("/api/messages")
+        def messages():
+            bot, peer = request.cookies.get("user"), request.args.get("peer")
+            with self.lock:
+                if peer in self.unread.get(bot, []):
+                    self.unread[bot].remove(peer)
+                history = self.conversations.get(bot, {}).get(peer, [])
+                return jsonify(messages=[{k: m[k] for k in ("id", "text", "from_bot")} for m in history])
+
+        @app.route("/api/send", methods=["POST"])
+        def send():
+            data = request.get_json(force=True)
+            self._record_reply(request.cookies.get("user"), data["peer"], data["text"])
+            return jsonify(ok=True)
+
+        @app.route("/api/poll")
+        def poll():
+            with self.lock:
+                return jsonify(unread_count=len(self.unread.get(request.cookies.get("user"), [])),
+                               last_id=self.last_id)
+
+        return app
+
+
+class TrafficGenerator:
+    """Injects messages into a MockChatServer at a fixed average rate"""
+
+    def __init__(self, server, bots, rate, peers=None, seed=0, messages=None):
+        self.server = server
+        self.bots = list(bots)
+        self.rate = rate
+        self.peers = peers or [f"Visitor{i}" for i in range(1, 21)]
+        self.messages = messages or ["hi", "hello", "how are you?", "where are you from?", "what's up"]
+        self.random = random.Random(seed)
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="mock-traffic", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            # Poisson arrivals: exponential gaps with the configured mean rate
+            if self.stop_event.wait(self.random.expovariate(self.rate)):
+                break
+            bot = self.random.choice(self.bots)
+            peer = self.random.choice(self.peers)
+            text = f"{self.random.choice(self.messages)} #{self.server.injected + 1}"
+            self.server.inject_message(bot, peer, text)
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stand-in ChatSafari server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--rate", type=float, default=0.0, help="Injected messages per second")
+    parser.add_argument("--bots", nargs="*", default=[], help="Usernames to send traffic to")
+    parser.add_argument("--replay", help="Trace file whose incoming messages are replayed instead of random traffic")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed; 0 replays as fast as possible")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = MockChatServer(port=args.port).start()
+    traffic = None
+    if args.replay:
+        import traces
+        _, events = traces.load(args.replay)
+        # --bots renames the recorded bots, in order of appearance
+        bot_map = traces.map_bots(events, args.bots) if args.bots else None
+        traffic = traces.TraceReplayer(server, events, args.speed or None, bot_map).start()
+    elif args.rate > 0 and args.bots:
+        traffic = TrafficGenerator(server, args.bots, args.rate).start()
+    try:
+        while True:
+            time.sleep(10)
+            logging.info(f"Mock server stats: {server.stats()}")
+    except KeyboardInterrupt:
+        if traffic:
+            traffic.stop()
+        server.stop()
@@ -0,0 +1,154 @@
+import time
+from selenium.common.exceptions import (
+    ElementClickInterceptedException, ElementNotInteractableException, StaleElementReferenceException,
+    TimeoutException, WebDriverException
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+import metrics
+import profiling
+
+
+class Selector:
+    """A named element lookup: locators tried in order, and how long to wait for any of them"""
+
+    def __init__(self, name, locators, timeout, cache=True, clickable=False):
+        self.name = name
+        self.locators = tuple(locators)
+        self.timeout = timeout
+        # Elements that survive for the life of the page are cached; ones a
+        # page rebuilds (like the open chat's input) can opt out
+        self.cache = cache
+        # Buttons only match once displayed and enabled, like element_to_be_clickable
+        self.clickable = clickable
+
+
+# Every single-element lookup ChatBot makes. Later locators are fallbacks for
+# markup changes; timeouts are short because the implicit wait is off and a
+# miss should fail fast. Login lookups wait for a full page load.
+SELECTORS = {selector.name: selector for selector in [
+    Selector("username_field", [(By.NAME, "username")], 10),
+    Selector("gender_select", [(By.NAME, "gender")], 10),
+    Selector("age_field", [(By.NAME, "age")], 10),
+    Selector("login_button", [(By.XPATH, "//button[@type='submit']"), (By.CSS_SELECTOR, "form button")], 10,
+             clickable=True),
+    Selector("chat_container", [(By.CLASS_NAME, "chat-container")], 2),
+    Selector("notification_bell", [
+        (By.CSS_SELECTOR, "button.p-2.text-gray-600"),
+        (By.CSS_SELECTOR, "button[aria-label*='otification']")
+    ], 1, clickable=True),
+    Selector("message_input", [
+        (By.CSS_SELECTOR, "input[placeholder='Type your message']"),
+        (By.CSS_SELECTOR, "textarea[placeholder*='message']")
+    ], 2, cache=False),
+    Selector("send_button", [(By.CSS_SELECTOR, "button[class*='send']"), (By.CSS_SELECTOR, "button[type='submit']")], 1,
+             cache=False, clickable=True)
+]}
+
+
+class PageElements:
+    """Cached element handles for one bot's page.
+
+    find() returns the cached handle when there is one, otherwise waits up to
+    the selector's timeout for the first of its locators to match. The cache
+    is dropped by invalidate() after navigation and per element whenever it
+    turns out stale. Lookups are counted per selector and result (cached,
+    hit, fallback, miss) in chatbot_selector_lookups_total.
+    """
+
+    def __init__(self, driver, registry=None):
+        self.driver = driver
+        self.registry = registry or SELECTORS
+        self.cache = {}
+        # Index of the locator that last matched, tried first next time
+        self.preferred = {}
+
+    def _record(self, name, result, start=None):
+        metrics.SELECTOR_LOOKUPS.inc(selector=name, result=result)
+        if start is not None:
+            metrics.SELECTOR_SECONDS.observe(time.perf_counter() - start, selector=name)
+
+    def _locate(self, driver, selector):
+        first = self.preferred.get(selector.name, 0)
+        order = [first] + [i for i in range(len(selector.locators)) if i != first]
+        for i in order:
+            for element in driver.find_elements(*selector.locators[i]):
+                if not selector.clickable:
+                    return i, element
+                try:
+                    if element.is_displayed() and element.is_enabled():
+                        return i, element
+                except StaleElementReferenceException:
+                    continue
+        return False
+
+    def find(self, name, timeout=None):
+        selector = self.registry[name]
+        cached = self.cache.get(name)
+        if cached is not None:
+            self._record(name, "cached")
+            return cached
+        start = time.perf_counter()
+        try:
+            with profiling.wait(f"selector:{name}"):
+                index, element = WebDriverWait(self.driver, selector.timeout if timeout is None else timeout,
+                                               poll_frequency=0.1).until(lambda driver: self._locate(driver, selector))
+        except TimeoutException:
+            self._record(name, "miss", start)
+            raise TimeoutException(f"No element for selector {name}")
+        self._record(name, "hit" if index == 0 else "fallback", start)
+        self.preferred[name] = index
+        if selector.cache:
+            self.cache[name] = element
+        return element
+
+    def present(self, name, timeout=None):
+        """Whether the element is on the page, checking a cached handle is still attached"""
+        cached = self.cache.get(name)
+        if cached is not None:
+            try:
+                cached.is_enabled()
+                self._record(name, "cached")
+                return True
+            except (StaleElementReferenceException, WebDriverException):
+                self.invalidate(name)
+        try:
+            self.find(name, timeout)
+            return True
+        except TimeoutException:
+            return False
+
+    def click(self, name, timeout=None):
+        """Click the element, looking it up again once if the cached handle went stale or was covered.
+
+        An element that still can't take the click counts as a miss and
+        raises TimeoutException, like one that never appeared.
+        """
+        try:
+            element = self.find(name, timeout)
+            element.click()
+        except (StaleElementReferenceException, ElementClickInterceptedException, ElementNotInteractableException):
+            self.invalidate(name)
+            element = self.find(name, timeout)
+            try:
+                element.click()
+            except (ElementClickInterceptedException, ElementNotInteractableException):
+                self.invalidate(name)
+                self._record(name, "miss")
+                raise TimeoutException(f"Element for selector {name} is not clickable")
+        return element
+
+    def invalidate(self, name=None):
+        """Forget one cached handle, or all of them after navigation"""
+        if name is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(name, None)
+
+    def stats(self):
+        """{selector: {result: count}} from the process-wide lookup counter"""
+        summary = {}
+        for series in metrics.SELECTOR_LOOKUPS.snapshot()["series"]:
+            labels = series["labels"]
+            summary.setdefault(labels["selector"], {})[labels["result"]] = series["value"]
+        return summary
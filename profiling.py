@@ -0,0 +1,360 @@
+import argparse
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from selenium.common.exceptions import TimeoutException
+import metrics
+from test_config import TEST_CONFIG
+
+# Opt-in instrumentation for bot cycles. When profiling is off every hook
+# below is a single global check; drivers are only wrapped when it is on.
+#
+# Output, under TEST_CONFIG["profiling"]["output_dir"]:
+#   cycles.jsonl    one line per monitor cycle (or login) with its time split
+#                   into WebDriver round-trips, sleeps and Python work, per
+#                   phase and per command
+#   commands.json   WebDriver command counts and times by command and call site
+#   stacks.folded   sampled stacks of the bots in sample_bots, one
+#                   "frame;frame;... count" line per stack, for flamegraph.pl
+#                   or speedscope
+
+_local = threading.local()
+_NULL = nullcontext()
+
+# Frames from these are the plumbing between a bot and chromedriver, not
+# the call site worth reporting
+_PLUMBING_DIRS = (os.sep + "selenium" + os.sep, os.sep + "urllib3" + os.sep)
+_PLUMBING_FILES = {"profiling.py", "browser_pool.py", "page_selectors.py"}
+
+
+def _call_site():
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        basename = os.path.basename(filename)
+        if basename not in _PLUMBING_FILES and not any(part in filename for part in _PLUMBING_DIRS):
+            return f"{basename}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class Span:
+    """Time split for one bot cycle or login, built up on the bot's thread"""
+
+    def __init__(self, bot, kind):
+        self.bot = bot
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.wall_started = time.time()
+        # [name, entered at, time spent in nested phases]
+        self.stack = []
+        self.phases = {}
+        self.commands = {}
+        self.waits = {}
+        self.webdriver = 0.0
+
+    def current_phase(self):
+        return self.stack[-1][0] if self.stack else "other"
+
+    def push(self, name):
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def pop(self):
+        name, entered, nested = self.stack.pop()
+        elapsed = time.perf_counter() - entered
+        phase = self.phases.setdefault(name, {"seconds": 0.0, "webdriver": 0.0})
+        phase["seconds"] += elapsed - nested
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def command(self, name, elapsed):
+        self.webdriver += elapsed
+        entry = self.commands.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        phase = self.phases.setdefault(self.current_phase(), {"seconds": 0.0, "webdriver": 0.0})
+        phase["webdriver"] += elapsed
+
+    def wait(self, label, elapsed, timed_out):
+        entry = self.waits.setdefault(label, [0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += int(timed_out)
+
+    def finish(self):
+        while self.stack:
+            self.pop()
+        total = time.perf_counter() - self.started
+        # Sleep phases are pauses by definition; whatever is neither a
+        # pause nor a WebDriver round-trip is Python work
+        sleep = self.phases.get("sleep", {}).get("seconds", 0.0) - self.phases.get("sleep", {}).get("webdriver", 0.0)
+        return {
+            "t": round(self.wall_started, 3),
+            "bot": self.bot,
+            "kind": self.kind,
+            "total": round(total, 6),
+            "webdriver": round(self.webdriver, 6),
+            "sleep": round(sleep, 6),
+            "python": round(max(0.0, total - self.webdriver - sleep), 6),
+            "commands": sum(count for count, _ in self.commands.values()),
+            "phases": {name: {key: round(value, 6) for key, value in phase.items()} for name, phase in self.phases.items()},
+            "by_command": {name: [count, round(seconds, 6)] for name, (count, seconds) in self.commands.items()},
+            "waits": {label: [count, round(seconds, 6), timeouts] for label, (count, seconds, timeouts) in self.waits.items()}
+        }
+
+
+class TracingExecutor:
+    """Wraps a driver's command executor to time every WebDriver command.
+
+    Shared by every bot using the driver (pooled browsers included); the
+    command is charged to whichever bot's span is open on the calling thread.
+    """
+
+    def __init__(self, executor, profiler):
+        self._executor = executor
+        self._profiler = profiler
+
+    def execute(self, command, params):
+        start = time.perf_counter()
+        try:
+            return self._executor.execute(command, params)
+        finally:
+            self._profiler.command(command, _call_site(), time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._executor, name)
+
+
+class Profiler:
+    def __init__(self, output_dir, sample_bots=(), sample_interval=0.01):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.sample_bots = set(sample_bots)
+        self.sample_interval = sample_interval
+        self.lock = threading.Lock()
+        self.cycles = open(os.path.join(output_dir, "cycles.jsonl"), "a", encoding="utf-8")
+        self.call_sites = {}
+        self.stacks = Counter()
+        # Thread ident -> span of a sampled bot currently running there
+        self.sampled = {}
+        self.stop_event = threading.Event()
+        self.sampler = None
+        if self.sample_bots:
+            self.sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+            self.sampler.start()
+
+    def wants_samples(self, bot):
+        return "*" in self.sample_bots or bot in self.sample_bots
+
+    def command(self, name, site, elapsed):
+        metrics.WEBDRIVER_SECONDS.observe(elapsed, command=name)
+        span = getattr(_local, "span", None)
+        if span is not None:
+            span.command(name, elapsed)
+        with self.lock:
+            entry = self.call_sites.setdefault((name, site), [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def finished(self, span):
+        line = json.dumps(span.finish(), separators=(",", ":"))
+        with self.lock:
+            if self.cycles:
+                self.cycles.write(line + "\n")
+
+    def _sample(self):
+        while not self.stop_event.wait(self.sample_interval):
+            frames = sys._current_frames()
+            for ident, span in list(self.sampled.items()):
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)})")
+                    frame = frame.f_back
+                stack.reverse()
+                # The bot and its open phases sit at the root so the flamegraph splits by them first
+                root = [span.bot] + [f"[{entry[0]}]" for entry in list(span.stack)]
+                with self.lock:
+                    self.stacks[";".join(root + stack)] += 1
+
+    def close(self):
+        self.stop_event.set()
+        if self.sampler:
+            self.sampler.join()
+        with self.lock:
+            if self.cycles:
+                self.cycles.close()
+                self.cycles = None
+            commands = [
+                {"command": name, "site": site, "count": count, "seconds": round(seconds, 6)}
+                for (name, site), (count, seconds) in sorted(self.call_sites.items(), key=lambda item: -item[1][1])
+            ]
+            stacks = sorted(self.stacks.items())
+        with open(os.path.join(self.output_dir, "commands.json"), "w", encoding="utf-8") as f:
+            json.dump(commands, f, indent=2)
+        if stacks:
+            with open(os.path.join(self.output_dir, "stacks.folded"), "w", encoding="utf-8") as f:
+                for stack, count in stacks:
+                    f.write(f"{stack} {count}\n")
+
+
+PROFILER = None
+
+
+def start(settings=None):
+    """Turn profiling on if TEST_CONFIG["profiling"] (or settings) enables it"""
+    global PROFILER
+    settings = settings or TEST_CONFIG["profiling"]
+    if not settings["enabled"]:
+        return None
+    stop()
+    PROFILER = Profiler(settings["output_dir"], settings["sample_bots"], settings["sample_interval"])
+    atexit.register(stop)
+    return PROFILER
+
+
+def stop():
+    global PROFILER
+    if PROFILER:
+        PROFILER.close()
+        PROFILER = None
+
+
+def instrument(driver):
+    """Route driver's commands through a TracingExecutor while profiling is on"""
+    profiler = PROFILER
+    if profiler is not None and not isinstance(driver.command_executor, TracingExecutor):
+        driver.command_executor = TracingExecutor(driver.command_executor, profiler)
+    return driver
+
+
+@contextmanager
+def _span(bot, kind, profiler):
+    outer = getattr(_local, "span", None)
+    span = _local.span = Span(bot, kind)
+    sampled = profiler.wants_samples(bot)
+    ident = threading.get_ident()
+    if sampled:
+        profiler.sampled[ident] = span
+    try:
+        yield span
+    finally:
+        _local.span = outer
+        if sampled:
+            if outer is not None and profiler.wants_samples(outer.bot):
+                profiler.sampled[ident] = outer
+            else:
+                profiler.sampled.pop(ident, None)
+        profiler.finished(span)
+
+
+def span(bot, kind="cycle"):
+    """Context for one monitor cycle (or login) of the named bot"""
+    profiler = PROFILER
+    if profiler is None:
+        return _NULL
+    return _span(bot, kind, profiler)
+
+
+@contextmanager
+def _phase(name, span):
+    span.push(name)
+    try:
+        yield
+    finally:
+        span.pop()
+
+
+def phase(name):
+    """Charge the time inside this block to phase name of the open span"""
+    span = getattr(_local, "span", None) if PROFILER is not None else None
+    if span is None:
+        return _NULL
+    return _phase(name, span)
+
+
+@contextmanager
+def _wait(label, span):
+    start = time.perf_counter()
+    timed_out = False
+    try:
+        yield
+    except TimeoutException:
+        timed_out = True
+        raise
+    finally:
+        span.wait(label, time.perf_counter() - start, timed_out)
+
+
+def wait(label):
+    """Time an explicit wait, counting the ones that end in a TimeoutException"""
+    span = getattr(_local, "span", None) if PROFILER is not None else None
+    if span is None:
+        return _NULL
+    return _wait(label, span)
+
+
+def phased(name):
+    """Decorator form of phase(); login spans are opened with kind instead"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if PROFILER is None:
+                return func(*args, **kwargs)
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def spanned(kind):
+    """Decorator for bot methods that run as a span of their own, like login"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if PROFILER is None:
+                return func(self, *args, **kwargs)
+            with span(self.username, kind), phase(kind):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def summarize(path):
+    """Mean per-cycle breakdown by span kind from a cycles.jsonl file"""
+    totals = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            cycle = json.loads(line)
+            kind = totals.setdefault(cycle["kind"], {"count": 0, "total": 0.0, "webdriver": 0.0, "sleep": 0.0,
+                                                     "python": 0.0, "commands": 0, "phases": {}})
+            kind["count"] += 1
+            for field in ("total", "webdriver", "sleep", "python", "commands"):
+                kind[field] += cycle[field]
+            for name, phase_times in cycle["phases"].items():
+                kind["phases"][name] = kind["phases"].get(name, 0.0) + phase_times["seconds"]
+    summary = {}
+    for name, kind in totals.items():
+        count = kind.pop("count")
+        summary[name] = {"count": count}
+        summary[name].update({field: round(value / count, 4) for field, value in kind.items() if field != "phases"})
+        summary[name]["phases"] = {phase_name: round(value / count, 4) for phase_name, value in kind["phases"].items()}
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a profiling run's per-cycle breakdown")
+    parser.add_argument("cycles", help="cycles.jsonl written by a profiled run")
+    args = parser.parse_args()
+
+    print(json.dumps(summarize(args.cycles), indent=2))
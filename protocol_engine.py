@@ -0,0 +1,231 @@
+import asyncio
+import json
+import random
+import threading
+import aiohttp
+from urllib.parse import urljoin
+import time
+import metrics
+import traces
+from chat_bots import ChatBot
+from test_config import TEST_CONFIG
+
+# Wire format, configurable through TEST_CONFIG["protocol_engine"]:
+#   login:    POST {login_path} {"username", "gender", "age"} -> {"token": ...} (token optional)
+#   incoming: {"type": message_event, "from": <peer>, "text": <message>, "id": <message id>}
+#   outgoing: {"type": send_event, "to": <peer>, "text": <message>}
+
+
+class ProtocolEngine:
+    """One asyncio loop and one connection pool shared by every ProtocolBot"""
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self):
+        self.settings = TEST_CONFIG["protocol_engine"]
+        self.loop = asyncio.new_event_loop()
+        self.connector = None
+        self.thread = threading.Thread(target=self._run_loop, name="protocol-engine", daemon=True)
+        self.thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the engine loop and return a concurrent future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        return self.submit(coro).result(timeout)
+
+    async def new_session(self):
+        # Bots share the TCP connector (pooled keep-alive connections) but each
+        # gets its own cookie jar so sessions stay isolated
+        if self.connector is None:
+            self.connector = aiohttp.TCPConnector(limit=self.settings["max_connections"])
+        return aiohttp.ClientSession(
+            connector=self.connector,
+            connector_owner=False,
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            timeout=aiohttp.ClientTimeout(total=self.settings["request_timeout"])
+        )
+
+    @classmethod
+    def close_shared(cls, timeout=10):
+        """Shut the shared engine down; the next shared() call starts a fresh one"""
+        with cls._shared_lock:
+            engine, cls._shared = cls._shared, None
+        if engine:
+            engine.shutdown(timeout)
+
+    def url(self, path):
+        return urljoin(self.settings["api_url"] or TEST_CONFIG["website_url"], path)
+
+    def shutdown(self, timeout=10):
+        async def close():
+            if self.connector:
+                await self.connector.close()
+        try:
+            self.run(close(), timeout=timeout)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout)
+            if not self.thread.is_alive():
+                self.loop.close()
+
+
+class ProtocolBot(ChatBot):
+    """ChatBot that talks to the chat backend over HTTP/WebSocket instead of a browser"""
+
+    # Already multiplexed on the engine's own event loop
+    schedulable = False
+    # A WebSocket costs next to nothing, so the governor neither gates nor pauses it
+    uses_browser = False
+
+    def __init__(self, username, gender, clock=None):
+        super().__init__(username, gender, clock)
+        self.engine = None
+        self.session = None
+        self.ws = None
+        self.token = None
+
+    def setup_driver(self, pool=None):
+        # No browser: the engine's shared loop and connection pool stand in for a driver
+        self.engine = ProtocolEngine.shared()
+
+    def login(self):
+        start = time.perf_counter()
+        try:
+            self.engine.run(self._login(), timeout=self.engine.settings["request_timeout"] * 2)
+            self.record_login(start, "success")
+            return True
+        except Exception as e:
+            self.log.error("Login failed for %s: %s", self.username, e)
+            self.record_login(start, "failure")
+            self.is_active = False
+            return False
+
+    async def _login(self):
+        if self.session is None:
+            self.session = await self.engine.new_session()
+        payload = {"username": self.username, "gender": self.gender, "age": self.age}
+        async with self.session.post(self.engine.url(self.engine.settings["login_path"]), json=payload) as resp:
+            resp.raise_for_status()
+            if resp.content_type == "application/json":
+                self.token = (await resp.json()).get("token")
+
+        params = {"token": self.token} if self.token else None
+        self.ws = await self.session.ws_connect(
+            self.engine.url(self.engine.settings["ws_path"]), params=params,
+            heartbeat=self.engine.settings["heartbeat_interval"]
+        )
+        self.log.info("Bot %s logged in successfully (protocol engine)", self.username)
+        self.is_active = True
+        return True
+
+    def start_monitoring(self):
+        self.last_heartbeat = time.time()
+        # A future on the engine loop, like the handle BotScheduler keeps for
+        # scheduled bots, so signal_stop() and stop_driver() cancel it the same way
+        self.task = self.engine.submit(self.monitor_chat())
+
+    async def monitor_chat(self):
+        self.log.info("Bot %s started monitoring chat", self.username)
+        message_event = self.engine.settings["message_event"]
+        heartbeat_interval = self.engine.settings["heartbeat_interval"]
+        receive = None
+        try:
+            while self.is_active:
+                # Wake up at least every heartbeat_interval so a quiet room
+                # doesn't look like a hung bot to the supervisor. The receive
+                # is kept across wake-ups: a timed-out ws.receive() aborts the
+                # connection
+                if receive is None:
+                    receive = asyncio.ensure_future(self.ws.receive())
+                done, _ = await asyncio.wait({receive}, timeout=heartbeat_interval)
+                self.last_heartbeat = time.time()
+                if not done:
+                    continue
+                frame, receive = receive.result(), None
+                if frame.type != aiohttp.WSMsgType.TEXT:
+                    if frame.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING,
+                                      aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        break
+                    continue
+                try:
+                    event = json.loads(frame.data)
+                except ValueError:
+                    continue
+                if event.get("type") != message_event or event.get("from") == self.username:
+                    continue
+
+                user_name = event.get("from")
+                message_text = (event.get("text") or "").strip()
+                if not message_text or not self.conversation_history.add(user_name, event.get("id"), message_text):
+                    continue
+
+                self.log.info("Bot %s received new message from %s: %s", self.username, user_name, message_text, extra={"peer": user_name})
+                metrics.MESSAGES_RECEIVED.inc(bot=self.username)
+                received_at = time.perf_counter()
+                received_clock = self.clock.time()
+                traces.record_message(self.username, user_name, event.get("id"), message_text, received_clock)
+                response = self.get_random_response()
+                await asyncio.sleep(self.clock.to_real(random.uniform(*self.config["conversation_settings"]["typing_delay"])))
+                await self.send_message(user_name, response)
+                metrics.REPLY_SECONDS.observe(time.perf_counter() - received_at, bot=self.username)
+                latency = self.clock.time() - received_clock
+                metrics.ARRIVAL_REPLY_SECONDS.observe(latency, bot=self.username)
+                traces.record(self.username, "reply", peer=user_name, text=response, latency=round(latency, 3))
+                await asyncio.sleep(self.clock.to_real(random.uniform(*self.config["response_delay"])))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.log.error("Error monitoring chat for %s: %s", self.username, e)
+        finally:
+            if receive is not None:
+                receive.cancel()
+            self.is_active = False
+
+    async def send_message(self, user_name, text):
+        start = time.perf_counter()
+        await self.ws.send_json({"type": self.engine.settings["send_event"], "to": user_name, "text": text})
+        metrics.SEND_SECONDS.observe(time.perf_counter() - start, bot=self.username)
+        metrics.MESSAGES_SENT.inc(bot=self.username)
+        self.log.info("Bot %s sent message to %s", self.username, user_name, extra={"peer": user_name})
+
+    def stop_driver(self, timeout):
+        """Cancel the message loop and close the bot's session; the shared engine keeps running"""
+        self.is_active = False
+        self.generation += 1
+        self.last_heartbeat = None
+        self.stop_event.set()
+        if self.task:
+            self.task.cancel()
+        self.close_session(timeout)
+
+    def cleanup(self, timeout=None):
+        self.signal_stop()
+        self.close_session(timeout)
+
+    def close_session(self, timeout=None):
+        if self.engine and self.session:
+            try:
+                self.engine.run(self._close(), timeout=10 if timeout is None else min(10, timeout))
+            except Exception as e:
+                self.log.error("Error closing session for %s: %s", self.username, e)
+
+    async def _close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        await self.session.close()
+        self.ws = None
+        self.session = None
@@ -0,0 +1,89 @@
+import itertools
+import random
+
+# Bot names
+INDIAN_MALE_NAMES = [
+    "Arjun", "Rahul", "Amit", "Rajesh", "Vikram", "Priyank", "Aditya", "Rohan",
+    "Neeraj", "Sachin", "Ankit", "Deepak", "Ravi", "Sanjay", "Manoj", "Kunal",
+    "Prakash", "Vishal", "Sunil", "Nitin"
+]
+
+AMERICAN_MALE_NAMES = [
+    "James", "John", "Michael", "David", "William", "Richard", "Joseph", "Thomas",
+    "Charles", "Christopher"
+]
+
+INDIAN_FEMALE_NAMES = [
+    "Priya", "Neha", "Anjali", "Meera", "Pooja", "Ritu", "Anita", "Deepika",
+    "Sneha", "Kavita", "Rani", "Sunita", "Lakshmi", "Geeta", "Maya"
+]
+
+AMERICAN_FEMALE_NAMES = [
+    "Mary", "Patricia", "Jennifer", "Linda", "Elizabeth", "Barbara", "Susan",
+    "Jessica", "Sarah", "Karen"
+]
+
+NAMES = {
+    "male": INDIAN_MALE_NAMES + AMERICAN_MALE_NAMES,
+    "female": INDIAN_FEMALE_NAMES + AMERICAN_FEMALE_NAMES
+}
+
+
+def default_roster():
+    """(username, gender) for every built-in bot identity"""
+    return [(name, gender) for gender in ("male", "female") for name in NAMES[gender]]
+
+
+class RosterGenerator:
+    """Endless, reproducible stream of unique (username, gender) identities.
+
+    Each gender's stream starts with the built-in names in a seeded order and
+    continues with numbered variants ("Arjun4821"). The same seed always
+    yields the same stream, and a shorter roster is always a prefix of a
+    longer one, so growing a fleet keeps the identities it already has.
+    """
+
+    def __init__(self, seed=0, male_share=0.5):
+        self.seed = seed
+        self.male_share = male_share
+
+    def names(self, gender):
+        rng = random.Random(f"{self.seed}:{gender}")
+        base = list(NAMES[gender])
+        rng.shuffle(base)
+        yield from base
+        used = set(base)
+        while True:
+            name = f"{rng.choice(base)}{rng.randint(10, 9999)}"
+            if name not in used:
+                used.add(name)
+                yield name
+
+    def identities(self):
+        """Genders interleaved so every prefix keeps male_share as closely as possible"""
+        streams = {gender: self.names(gender) for gender in ("male", "female")}
+        for i in itertools.count():
+            male = int((i + 1) * self.male_share) > int(i * self.male_share)
+            gender = "male" if male else "female"
+            yield next(streams[gender]), gender
+
+    def roster(self, count):
+        return list(itertools.islice(self.identities(), count))
+
+    def by_gender(self, male, female):
+        """The first male male and female female identities, males first"""
+        return (
+            [(name, "male") for name in itertools.islice(self.names("male"), male)]
+            + [(name, "female") for name in itertools.islice(self.names("female"), female)]
+        )
+
+    def take(self, count, exclude=()):
+        """The first count identities in the stream whose usernames are not in exclude"""
+        exclude = set(exclude)
+        fresh = (identity for identity in self.identities() if identity[0] not in exclude)
+        return list(itertools.islice(fresh, count))
+
+
+def generator_for(counts, seed):
+    total = counts.get("male", 0) + counts.get("female", 0)
+    return RosterGenerator(seed, counts.get("male", 0) / total if total else 0.5)
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import profiling
+from test_config import TEST_CONFIG
+
+
+class BotScheduler:
+    """Runs many bots' monitor cycles on one event loop and a small worker pool.
+
+    Each bot is an asyncio task that alternates between one monitor_cycle()
+    on a worker thread and a non-blocking pause. A global semaphore caps the
+    number of bots issuing browser commands at once; asyncio hands it out in
+    FIFO order, so every bot gets its turn.
+    """
+
+    def __init__(self, worker_threads=None, max_inflight=None):
+        settings = TEST_CONFIG["scheduler"]
+        self.executor = ThreadPoolExecutor(
+            max_workers=worker_threads or settings["worker_threads"], thread_name_prefix="bot-worker"
+        )
+        self.max_inflight = max_inflight or settings["max_inflight"]
+        self.loop = asyncio.new_event_loop()
+        self.semaphore = None
+        self.tasks = {}
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run_loop, name="bot-scheduler", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.semaphore = asyncio.Semaphore(self.max_inflight)
+        self.loop.call_soon(self.ready.set)
+        self.loop.run_forever()
+
+    def add_bot(self, bot):
+        bot.last_heartbeat = time.time()
+        future = asyncio.run_coroutine_threadsafe(self._run_bot(bot), self.loop)
+        self.tasks[bot.username] = future
+        bot.task = future
+        return future
+
+    def cancel_bot(self, bot):
+        bot.is_active = False
+        future = self.tasks.pop(bot.username, None)
+        if future:
+            future.cancel()
+
+    @staticmethod
+    def _cycle(bot):
+        # Scheduled bots pause on the event loop, so their profiled cycles cover only the worker's share
+        with profiling.span(bot.username):
+            return bot.monitor_cycle()
+
+    async def _in_worker(self, func, *args):
+        # Only bots holding the semaphore may issue browser commands
+        async with self.semaphore:
+            return await self.loop.run_in_executor(self.executor, func, *args)
+
+    async def _run_bot(self, bot):
+        bot.log.info("Bot %s started monitoring chat (scheduled)", bot.username)
+        try:
+            while bot.is_active:
+                delay, idle = await self._in_worker(self._cycle, bot)
+                if not bot.is_active:
+                    break
+                if idle and bot.push_mode():
+                    await self._wait_for_event(bot, delay)
+                else:
+                    await asyncio.sleep(bot.clock.to_real(delay))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            bot.log.error("Error monitoring chat for %s: %s", bot.username, e)
+            bot.is_active = False
+        finally:
+            self.tasks.pop(bot.username, None)
+
+    async def _wait_for_event(self, bot, fallback_delay):
+        # Checks the page's observer state instantly and sleeps on the loop in
+        # between, so an idle bot never parks a worker thread
+        settings = bot.config["event_detection"]
+        deadline = self.loop.time() + bot.clock.to_real(settings["max_wait"])
+        baseline = None
+        try:
+            while bot.is_active and self.loop.time() < deadline:
+                result = await self._in_worker(bot.check_chat_event, baseline, 0)
+                if result["changed"]:
+                    return
+                baseline = result["baseline"]
+                await asyncio.sleep(settings["pooled_poll_interval"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            bot.log.error("Bot %s event wait failed, falling back to polling: %s", bot.username, e)
+            await asyncio.sleep(bot.clock.to_real(fallback_delay))
+
+    async def _cancel_all(self):
+        tasks = [task for task in asyncio.all_tasks(self.loop) if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def shutdown(self, timeout=10):
+        """Cancel every bot task and let it unwind, then stop and close the loop"""
+        try:
+            # A task waiting on a worker stuck in a browser command unwinds at
+            # once; only the worker thread stays behind
+            asyncio.run_coroutine_threadsafe(self._cancel_all(), self.loop).result(timeout)
+        except Exception as e:
+            logging.error(f"Scheduler tasks did not finish cancelling: {str(e)}")
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout)
+            if not self.thread.is_alive():
+                self.loop.close()
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+import time
+
+# Keys WebDriver accepts back through add_cookie
+COOKIE_KEYS = ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")
+
+READ_LOCAL_STORAGE_JS = "return Object.assign({}, window.localStorage);"
+WRITE_LOCAL_STORAGE_JS = """
+const items = arguments[0];
+for (const key of Object.keys(items)) window.localStorage.setItem(key, items[key]);
+"""
+
+
+class SessionStore:
+    """Per-bot browser session snapshots (cookies and local storage) keyed by username"""
+
+    def __init__(self, directory, max_age=None):
+        self.directory = directory
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, username):
+        return os.path.join(self.directory, f"{username}.json")
+
+    def profile_dir(self, username):
+        return os.path.abspath(os.path.join(self.directory, "profiles", username))
+
+    def save(self, username, driver):
+        snapshot = {
+            "saved_at": time.time(),
+            "url": driver.current_url,
+            "cookies": driver.get_cookies(),
+            "local_storage": driver.execute_script(READ_LOCAL_STORAGE_JS)
+        }
+        tmp_path = f"{self.path(username)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path(username))
+
+    def load(self, username):
+        try:
+            with open(self.path(username)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.max_age and time.time() - snapshot.get("saved_at", 0) > self.max_age:
+            return None
+        return snapshot
+
+    def discard(self, username):
+        try:
+            os.remove(self.path(username))
+        except OSError:
+            pass
+
+    def restore(self, username, driver, url):
+        """Load a saved session into driver; returns False when there is none to restore"""
+        snapshot = self.load(username)
+        if snapshot is None:
+            return False
+        # Cookies and storage can only be set for the origin currently loaded
+        driver.get(url)
+        driver.delete_all_cookies()
+        for cookie in snapshot["cookies"]:
+            try:
+                driver.add_cookie({key: cookie[key] for key in COOKIE_KEYS if key in cookie})
+            except Exception as e:
+                logging.debug(f"Skipping cookie {cookie.get('name')} for {username}: {str(e)}")
+        if snapshot["local_storage"]:
+            driver.execute_script(WRITE_LOCAL_STORAGE_JS, snapshot["local_storage"])
+        driver.get(snapshot.get("url") or url)
+        return True
@@ -0,0 +1,95 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Blocking token bucket used to ramp logins at a fixed rate"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class StartupReport:
+    """Timings and failure counts for one fleet startup.
+
+    Bots are tracked by username, so a bot that is deferred, paused or
+    retried and then started again still counts once.
+    """
+
+    def __init__(self, usernames=()):
+        self.expected = set(usernames)
+        self.started_at = time.monotonic()
+        self.first_active_at = None
+        self.all_active_at = None
+        self.active = set()
+        self.failed_attempts = 0
+        self.retries = 0
+        self.gave_up = []
+        self.lock = threading.Lock()
+
+    @property
+    def total_bots(self):
+        return len(self.expected)
+
+    def expect(self, usernames):
+        with self.lock:
+            new = set(usernames) - self.expected
+            if new:
+                self.expected |= new
+                self.all_active_at = None
+
+    def record_success(self, bot):
+        with self.lock:
+            now = time.monotonic()
+            self.active.add(bot.username)
+            if bot.username in self.gave_up:
+                self.gave_up.remove(bot.username)
+            if self.first_active_at is None:
+                self.first_active_at = now
+            if self.all_active_at is None and len(self.active) >= len(self.expected):
+                self.all_active_at = now
+
+    def record_failure(self, bot, will_retry):
+        with self.lock:
+            self.failed_attempts += 1
+            if will_retry:
+                self.retries += 1
+            elif bot.username not in self.gave_up:
+                self.gave_up.append(bot.username)
+
+    def is_settled(self):
+        with self.lock:
+            return len(self.active) + len(self.gave_up) >= len(self.expected)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "total_bots": len(self.expected),
+                "active_bots": len(self.active),
+                "time_to_first_active": self._elapsed(self.first_active_at),
+                "time_to_all_active": self._elapsed(self.all_active_at),
+                "failed_attempts": self.failed_attempts,
+                "retries": self.retries,
+                "gave_up": list(self.gave_up)
+            }
+
+    def _elapsed(self, timestamp):
+        if timestamp is None:
+            return None
+        return round(timestamp - self.started_at, 3)
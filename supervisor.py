@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+from browser_pool import PooledDriver, driver_rss_mb
+from test_config import TEST_CONFIG
+
+
+class _Health:
+    """Restart bookkeeping for one supervised bot"""
+
+    def __init__(self):
+        self.failures = 0
+        self.next_attempt = 0.0
+        self.circuit_open_until = 0.0
+        self.restarting = False
+        self.restarts = 0
+
+
+class BotSupervisor:
+    """Watches running bots and restarts the ones that die, hang or wear out.
+
+    A bot is supervised once it has started monitoring. Each check looks for a
+    stopped monitor loop, a heartbeat older than hung_after, or a Chrome that
+    is too old or too big, and restarts that bot alone on a small executor.
+    Failed restarts back off exponentially; after max_retries in a row the
+    bot's circuit opens and it is left alone for circuit_cooldown seconds.
+    """
+
+    def __init__(self, manager, settings=None):
+        self.manager = manager
+        self.settings = settings or TEST_CONFIG["supervisor"]
+        self.health = {}
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bot-restart")
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="bot-supervisor", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        while not self.stop_event.wait(self.settings["check_interval"]):
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"Supervisor check failed: {str(e)}")
+
+    def check(self):
+        now = time.time()
+        pool = self.manager.browser_pool
+        if pool:
+            # Shared Chromes wear out as a whole: once one is drained,
+            # diagnose() moves its bots to a fresh one
+            pool.drain_worn(self.settings["max_driver_age"], self.settings["max_driver_rss_mb"])
+        for bot in list(self.manager.bots):
+            health = self.health.get(bot.username)
+            if health is None:
+                # Bots that never reached monitoring are still owned by startup retries
+                if bot.last_heartbeat is None:
+                    continue
+                health = self.health[bot.username] = _Health()
+            # Paused bots belong to the governor until it starts them again
+            if bot.stopped or bot.paused or health.restarting:
+                continue
+            reason = self.diagnose(bot, now)
+            if reason is None:
+                continue
+            if now < health.circuit_open_until or now < health.next_attempt:
+                continue
+            logging.warning(f"Supervisor restarting {bot.username}: {reason}")
+            health.restarting = True
+            try:
+                self.executor.submit(self._restart, bot, health, reason)
+            except RuntimeError:
+                # Executor already shut down by stop()
+                return
+        # Forget bots removed from the fleet
+        usernames = {bot.username for bot in self.manager.bots}
+        for username in list(self.health):
+            if username not in usernames:
+                del self.health[username]
+
+    def diagnose(self, bot, now):
+        """Why bot needs a restart, or None when it looks healthy"""
+        # Protocol bots have no driver; their WebSocket loop clears is_active when it ends
+        if not bot.is_active or (bot.uses_browser and bot.driver is None):
+            return "not running"
+        if bot.last_heartbeat and now - bot.last_heartbeat > self.settings["hung_after"]:
+            return f"no heartbeat for {now - bot.last_heartbeat:.0f}s"
+        if isinstance(bot.driver, PooledDriver):
+            # A fresh tab in the same Chrome would renew nothing; age and
+            # memory are judged per shared browser by BrowserPool.drain_worn
+            if bot.driver._browser.draining:
+                return "shared browser draining"
+            return None
+        if bot.driver_started_at and now - bot.driver_started_at > self.settings["max_driver_age"]:
+            return "driver reached max age"
+        if bot.uses_browser:
+            rss = driver_rss_mb(bot.driver)
+            if rss > self.settings["max_driver_rss_mb"]:
+                return f"driver using {rss:.0f} MB"
+        return None
+
+    def _restart(self, bot, health, reason):
+        started = False
+        try:
+            bot.stop_driver(self.settings["quit_timeout"])
+            if self.stop_event.is_set() or bot.stopped:
+                return
+            bot.setup_driver(self.manager.browser_pool)
+            started = bot.login()
+            if started:
+                self.manager._start_monitoring(bot)
+        except Exception as e:
+            logging.error(f"Supervisor failed to restart {bot.username}: {str(e)}")
+        finally:
+            health.restarting = False
+
+        result = "success" if started else "failure"
+        metrics.RESTARTS.inc(bot=bot.username, result=result)
+        if started:
+            health.failures = 0
+            health.next_attempt = 0.0
+            health.restarts += 1
+            logging.info(f"Supervisor restarted {bot.username} after {reason}")
+            return
+
+        health.failures += 1
+        now = time.time()
+        if health.failures >= self.settings["max_retries"]:
+            health.circuit_open_until = now + self.settings["circuit_cooldown"]
+            health.failures = 0
+            logging.error(
+                f"Supervisor giving up on {bot.username} for {self.settings['circuit_cooldown']}s "
+                f"after {self.settings['max_retries']} failed restarts"
+            )
+        else:
+            delay = min(self.settings["max_backoff"], self.settings["retry_delay"] * 2 ** (health.failures - 1))
+            health.next_attempt = now + delay
+            logging.info(f"Supervisor will retry {bot.username} in {delay:.0f}s")
+
+    def status(self):
+        now = time.time()
+        return {
+            username: {
+                "restarts": health.restarts,
+                "failures": health.failures,
+                "circuit_open": now < health.circuit_open_until
+            }
+            for username, health in self.health.items()
+        }
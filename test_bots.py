@@ -1,19 +1,12 @@
 import time
 import logging
-import sys
 from chat_bots import ChatBot, BotManager, INDIAN_MALE_NAMES, AMERICAN_MALE_NAMES, INDIAN_FEMALE_NAMES, AMERICAN_FEMALE_NAMES
 from test_config import TEST_CONFIG, LOGGING_CONFIG
+import log_pipeline
 
 def setup_logging():
     # Set up logging to both file and console
-    logging.basicConfig(
-        level=getattr(logging, LOGGING_CONFIG["level"]),
-        format=LOGGING_CONFIG["format"],
-        handlers=[
-            logging.FileHandler(LOGGING_CONFIG["filename"]),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    log_pipeline.configure({**TEST_CONFIG["logging"], **LOGGING_CONFIG, "json": False}, console=True)
 
 def print_bot_details(bot):
     """Print detailed information about a bot"""
@@ -43,16 +36,10 @@ def test_single_bot():
         if bot.login():
             logging.info("Bot login successful")
             
-            # Monitor for 1 minute
-            start_time = time.time()
+            # Monitor for 1 minute; monitor_chat loops on its own thread until cleanup
             logging.info("Starting chat monitoring...")
-            while time.time() - start_time < 60:
-                try:
-                    bot.monitor_chat()
-                    time.sleep(1)
-                except Exception as e:
-                    logging.error(f"Error during chat monitoring: {str(e)}")
-                    break
+            bot.start_monitoring()
+            time.sleep(60)
         else:
             logging.error("Bot login failed")
             
@@ -87,24 +74,19 @@ def test_multiple_bots():
         logging.info("\nStarting all bots...")
         for bot in manager.bots:
             print_bot_details(bot)
-            try:
-                bot.setup_driver()
-                if bot.login():
-                    bot.start_monitoring()
-                    logging.info(f"Successfully started bot: {bot.username}")
-                else:
-                    logging.error(f"Failed to login bot: {bot.username}")
-            except Exception as e:
-                logging.error(f"Error starting bot {bot.username}: {str(e)}")
+        manager.start_all_bots()
+        logging.info(f"Startup report: {manager.startup_report.to_dict()}")
         
-        # Monitor for test duration
-        start_time = time.time()
-        while time.time() - start_time < TEST_CONFIG["test_duration"]:
+        # Monitor for test duration, in the manager's clock time (CLOCK_SPEED
+        # compresses a long run)
+        clock = manager.clock
+        start_time = clock.time()
+        while clock.time() - start_time < TEST_CONFIG["test_duration"]:
             active_bots = sum(1 for bot in manager.bots if bot.is_active)
             logging.info(f"\nStatus Update:")
             logging.info(f"Active bots: {active_bots}/{len(manager.bots)}")
-            logging.info(f"Time elapsed: {int(time.time() - start_time)} seconds")
-            time.sleep(10)
+            logging.info(f"Time elapsed: {int(clock.time() - start_time)} seconds")
+            clock.sleep(10)
             
     except Exception as e:
         logging.error(f"Error in multiple bots test: {str(e)}")
@@ -1,3 +1,5 @@
+import os
+
 # Test Configuration
 TEST_CONFIG = {
     "website_url": "https://chatsafari.com",
@@ -5,8 +7,147 @@ TEST_CONFIG = {
         "male": 30,  # 20 Indian + 10 American
         "female": 25  # 15 Indian + 10 American
     },
+    "roster": {
+        "seed": int(os.environ.get("ROSTER_SEED", 0))  # Same seed, same bot identities; counts beyond the built-in names get numbered variants
+    },
     "headless": False,  # Set to True to run without browser window
+    "engine": {
+        "default": "selenium",  # "selenium" drives a browser, "protocol" talks HTTP/WebSocket
+        "per_bot": {}  # Per-username override, e.g. {"Arjun": "protocol"}
+    },
+    "protocol_engine": {
+        "api_url": None,  # Backend base URL, defaults to website_url
+        "login_path": "/api/login",
+        "ws_path": "/ws",
+        "message_event": "message",  # Event type of incoming chat messages
+        "send_event": "send_message",  # Event type used to send a reply
+        "max_connections": 1000,  # Shared connection pool size
+        "request_timeout": 30,
+        "heartbeat_interval": 30  # WebSocket ping interval; also the longest a quiet bot goes without a heartbeat
+    },
+    "launch_profile": {
+        "lean": True,  # Performance-oriented Chrome flags, request blocking and no implicit wait
+        "renderer_process_limit": 4,  # Renderer processes per Chrome instance
+        "renderer_heap_mb": 256,  # V8 heap cap per renderer
+        "blocked_urls": [  # Request patterns blocked through CDP
+            "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+            "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm", "*.mp3",
+            "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+            "*facebook.net*", "*hotjar.com*", "*clarity.ms*"
+        ]
+    },
+    "browser_pool": {
+        "enabled": True,  # Share Chrome instances between bots
+        "bots_per_browser": 8,  # Bots (tabs) per Chrome process
+        "isolate_contexts": True  # Give each bot its own browser context (cookies, storage)
+    },
     "debug": True,  # Enable debug logging
+    "startup": {
+        "max_parallel": 8,  # Bots logging in at the same time
+        "logins_per_second": 2.0,  # Ramp rate for new logins
+        "burst": 4,  # Logins allowed back-to-back before the ramp applies
+        "max_retries": 3,  # Background login retries per bot
+        "retry_backoff": (5, 60)  # Base and maximum retry delay in seconds
+    },
+    "scheduler": {
+        "mode": "threads",  # "threads" runs one thread per bot, "asyncio" multiplexes bots on one event loop
+        "worker_threads": 8,  # Threads executing blocking browser work in asyncio mode
+        "max_inflight": 8  # Bots allowed to issue browser commands at the same time
+    },
+    "event_detection": {
+        "mode": "poll",  # "poll" sleeps between checks, "push" wakes on DOM change events
+        "watch_selectors": ["span.unread-count", "div.chat-message"],  # Changes here wake the bot
+        "unread_badge_selector": "span.unread-count",  # A rising badge count wakes the bot
+        "max_wait": 30,  # Run a full check at least this often in push mode
+        "pooled_poll_interval": 0.25  # Event check interval for bots on a shared browser
+    },
+    "corpus": {
+        "path": "corpus.json"  # Responses and topic questions with optional weights; relative to this directory
+    },
+    "conversations": {
+        "policy": "round_robin",  # "round_robin" or "oldest_first" when several peers are waiting
+        "reply_pacing": (2, 4)  # Seconds before the same peer can get another reply; other peers are served meanwhile
+    },
+    "history": {
+        "per_peer_window": 500,  # Messages remembered per peer for dedup
+        "compact_dir": None  # Directory to append evicted history to, None to drop it
+    },
+    "fleet": {
+        "coordinator_address": ("127.0.0.1", 6000),  # Where the coordinator listens; pass --address to expose it
+        "authkey": os.environ.get("FLEET_AUTHKEY"),  # Shared secret, required on every node
+        "heartbeat_interval": 5,  # Seconds between worker heartbeats
+        "heartbeat_timeout": 20,  # Reassign a worker's bots after this much silence
+        "status_path": "fleet_status.json"  # Aggregated status written by the coordinator
+    },
+    "metrics": {
+        "snapshot_path": "metrics.json",  # Registry snapshot read by flask_app's /metrics
+        "snapshot_interval": 10  # Seconds between snapshots
+    },
+    "sessions": {
+        "enabled": True,  # Save cookies/local storage per bot and reuse them on restart
+        "directory": "sessions",  # Where session snapshots and profiles are kept
+        "persist_profile": False,  # Also keep a Chrome profile per bot (standalone drivers only)
+        "max_age": 43200,  # Ignore snapshots older than this many seconds
+        "warm_timeout": 5  # Seconds to wait for the chat room after restoring a session
+    },
+    "supervisor": {
+        "enabled": True,  # Restart dead, hung or worn-out bots
+        "check_interval": 10,  # Seconds between health checks
+        "hung_after": 180,  # A bot with no heartbeat for this long is considered hung
+        "max_retries": int(os.environ.get("MAX_RETRIES", 3)),  # Failed restarts before the circuit opens
+        "retry_delay": float(os.environ.get("RETRY_DELAY", 5)),  # First restart backoff in seconds
+        "max_backoff": 300,  # Backoff cap in seconds
+        "circuit_cooldown": 900,  # Seconds a bot is left alone once its circuit opens
+        "max_driver_age": 6 * 3600,  # Proactively restart Chrome after this many seconds (pooled: the shared Chrome is drained and replaced)
+        "max_driver_rss_mb": 1500,  # ...or once its process tree uses this much memory (pooled: per bot sharing it)
+        "quit_timeout": 15  # Seconds to wait for driver.quit() before killing Chrome
+    },
+    "governor": {
+        "enabled": True,  # Admit, pause and resume bots to fit the host's CPU and memory
+        "check_interval": 5,  # Seconds between host samples
+        "cpu_admit_percent": 80,  # Start new bots only while host CPU is below this
+        "cpu_shed_percent": 95,  # Pause the newest bot when CPU stays above this...
+        "shed_after": 3,  # ...for this many checks in a row
+        "memory_reserve_mb": 256,  # Available memory kept free; below it bots are paused
+        "bot_rss_mb": 300,  # Per-bot Chrome memory assumed until it can be measured
+        "min_bots": 1,  # Never pause below this many bots
+        "max_bots": int(os.environ["MAX_BOTS"]) if os.environ.get("MAX_BOTS") else None  # Hard cap on running bots
+    },
+    "profiling": {
+        "enabled": os.environ.get("PROFILE") == "1",  # Time every WebDriver command and cycle phase
+        "output_dir": "profiles",  # cycles.jsonl, commands.json and stacks.folded go here
+        "sample_bots": [name for name in os.environ.get("PROFILE_BOTS", "").split(",") if name],  # Bots ("*" for all) to attach the sampling profiler to
+        "sample_interval": 0.01  # Seconds between stack samples
+    },
+    "shutdown": {
+        "deadline": float(os.environ.get("SHUTDOWN_DEADLINE", 30)),  # Seconds stop_all_bots may take before killing what is left
+        "quit_timeout": 10,  # Seconds each driver.quit() gets before its Chrome is killed
+        "join_timeout": 2,  # Seconds to wait for a monitor thread to notice the stop
+        "max_parallel": 32  # Bots torn down at once
+    },
+    "logging": {
+        "filename": "chat_bots.log",
+        "level": "INFO",
+        "json": True,  # JSON lines with bot/peer fields; False uses format below
+        "format": "%(asctime)s - %(levelname)s - %(message)s",
+        "queue_size": 100000,  # Records beyond this are dropped rather than blocking a bot
+        "batch_size": 512,  # Records written per flush
+        "flush_interval": 0.5,  # Seconds before a partial batch is flushed
+        "max_bytes": 50 * 1024 * 1024,  # Rotate once the file reaches this size...
+        "rotate_interval": 24 * 3600,  # ...or this many seconds after it was opened
+        "backup_count": 10,
+        "sample_rates": {  # Fraction kept of records logged with extra={"sample": key}
+            "no_unread": 0.01,
+            "no_bell": 0.01,
+            "cycle_timeout": 0.1
+        }
+    },
+    "clock": {
+        "speed": float(os.environ.get("CLOCK_SPEED", 1))  # >1 runs bot pacing that many times faster, for soak tests against the mock server
+    },
+    "trace": {
+        "path": os.environ.get("TRACE_PATH")  # Record logins, unread peers, messages and replies here (.gz to compress)
+    },
     "response_delay": (1, 3),  # Delay between responses
     "test_duration": 86400,  # Test duration in seconds (24 hours)
     "conversation_settings": {
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import unittest
+from history import ConversationHistory
+
+
+class ConversationHistoryTest(unittest.TestCase):
+    def test_duplicate_is_rejected(self):
+        history = ConversationHistory(3)
+        self.assertTrue(history.add("peer", "m1", "hi"))
+        self.assertFalse(history.add("peer", "m1", "hi"))
+        self.assertTrue(history.add("other", "m1", "hi"))
+
+    def test_window_is_bounded(self):
+        history = ConversationHistory(3)
+        for i in range(5):
+            history.add("peer", f"m{i}", f"text {i}")
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.evicted, 2)
+        self.assertNotIn(("peer", "m0", "text 0"), history)
+        self.assertIn(("peer", "m4", "text 4"), history)
+
+    def test_positional_ids_stay_seen_after_eviction(self):
+        history = ConversationHistory(3)
+        messages = [(i, f"text {i}") for i in range(5)]
+        first = [history.add("peer", i, text, positional=True) for i, text in messages]
+        # Every visit re-reads the whole conversation from position 0
+        second = [history.add("peer", i, text, positional=True) for i, text in messages]
+        self.assertEqual(first, [True] * 5)
+        self.assertEqual(second, [False] * 5)
+        self.assertTrue(history.add("peer", 5, "text 5", positional=True))
+
+    def test_positions_are_per_peer(self):
+        history = ConversationHistory(3)
+        history.add("a", 4, "late", positional=True)
+        self.assertTrue(history.add("b", 0, "first", positional=True))
+
+    def test_trimmed_conversation_keeps_answering(self):
+        history = ConversationHistory(3)
+        page = [(i, f"text {i}") for i in range(5)]
+        for i, text in page:
+            history.add("peer", i, text, positional=True)
+        # The page drops its two oldest messages, then a new one arrives
+        page = [(i, f"text {i + 2}") for i in range(3)] + [(3, "text 5")]
+        history.align("peer", page)
+        new = [text for i, text in page if history.add("peer", i, text, positional=True)]
+        self.assertEqual(new, ["text 5"])
+
+    def test_reset_conversation_counts_as_new(self):
+        history = ConversationHistory(3)
+        for i in range(4):
+            history.add("peer", i, f"text {i}", positional=True)
+        page = [(0, "fresh start")]
+        history.align("peer", page)
+        self.assertTrue(history.add("peer", 0, "fresh start", positional=True))
+
+    def test_align_leaves_an_unchanged_page_alone(self):
+        history = ConversationHistory(3)
+        page = [(i, f"text {i}") for i in range(3)]
+        for i, text in page:
+            history.add("peer", i, text, positional=True)
+        history.align("peer", page)
+        self.assertFalse(any(history.add("peer", i, text, positional=True) for i, text in page))
+
+    def test_evicted_keys_are_compacted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bot.jsonl")
+            history = ConversationHistory(2, path)
+            for i in range(3):
+                history.add("peer", f"m{i}", f"text {i}")
+            with open(path) as f:
+                entries = [json.loads(line) for line in f]
+        self.assertEqual([(e["peer"], e["id"], e["text"]) for e in entries], [("peer", "m0", "text 0")])
+
+
+if __name__ == "__main__":
+    unittest.main()
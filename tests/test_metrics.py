@@ -0,0 +1,42 @@
+import unittest
+from metrics import MetricsRegistry, merge_snapshots, percentile
+
+
+class MergeSnapshotsTest(unittest.TestCase):
+    def worker_snapshot(self, bot, latencies):
+        registry = MetricsRegistry()
+        replies = registry.counter("replies_total", "Replies sent")
+        latency = registry.histogram("reply_latency_seconds", "Reply latency")
+        for seconds in latencies:
+            replies.inc(bot=bot)
+            replies.inc(bot="shared")
+            latency.observe(seconds, bot=bot)
+        return registry.snapshot()
+
+    def test_counters_are_summed_per_labels(self):
+        merged = merge_snapshots([self.worker_snapshot("a", [0.1, 0.2]), self.worker_snapshot("b", [0.3])])
+        replies = merged["metrics"]["replies_total"]
+        values = {s["labels"]["bot"]: s["value"] for s in replies["series"]}
+        self.assertEqual(values, {"a": 2, "b": 1, "shared": 3})
+        self.assertEqual(replies["total"], 6)
+
+    def test_histograms_merge_into_one_total(self):
+        merged = merge_snapshots([self.worker_snapshot("a", [0.1, 0.2]), self.worker_snapshot("b", [0.3])])
+        total = merged["metrics"]["reply_latency_seconds"]["total"]
+        self.assertEqual(total["count"], 3)
+        self.assertAlmostEqual(total["sum"], 0.6)
+        self.assertEqual((total["min"], total["max"]), (0.1, 0.3))
+        self.assertAlmostEqual(percentile(total, 1.0), 0.3)
+
+    def test_inputs_are_left_untouched(self):
+        snapshot = self.worker_snapshot("a", [0.1])
+        merge_snapshots([snapshot, snapshot])
+        self.assertEqual(snapshot["metrics"]["replies_total"]["total"], 2)
+        self.assertEqual(snapshot["metrics"]["reply_latency_seconds"]["series"][0]["count"], 1)
+
+    def test_no_workers_is_an_empty_snapshot(self):
+        self.assertEqual(merge_snapshots([])["metrics"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
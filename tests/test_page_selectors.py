@@ -0,0 +1,67 @@
+import unittest
+from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException
+from page_selectors import PageElements, Selector
+
+
+class _Element:
+    def __init__(self, displayed=True, intercepted=0):
+        self.displayed = displayed
+        self.intercepted = intercepted
+        self.clicks = 0
+
+    def is_displayed(self):
+        return self.displayed
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        if self.intercepted:
+            self.intercepted -= 1
+            raise ElementClickInterceptedException("covered")
+        self.clicks += 1
+
+
+class _Driver:
+    def __init__(self, elements):
+        self.elements = elements
+
+    def find_elements(self, by, value):
+        return self.elements.get(value, [])
+
+
+def _registry(clickable):
+    return {"bell": Selector("bell", [("css selector", "bell")], 0.2, clickable=clickable)}
+
+
+class PageElementsClickTest(unittest.TestCase):
+    def test_clickable_selector_skips_hidden_elements(self):
+        hidden, visible = _Element(displayed=False), _Element()
+        elements = PageElements(_Driver({"bell": [hidden, visible]}), _registry(clickable=True))
+        self.assertIs(elements.find("bell"), visible)
+
+    def test_hidden_only_element_is_a_miss(self):
+        elements = PageElements(_Driver({"bell": [_Element(displayed=False)]}), _registry(clickable=True))
+        with self.assertRaises(TimeoutException):
+            elements.find("bell")
+
+    def test_presence_selector_takes_hidden_elements(self):
+        hidden = _Element(displayed=False)
+        elements = PageElements(_Driver({"bell": [hidden]}), _registry(clickable=False))
+        self.assertIs(elements.find("bell"), hidden)
+
+    def test_intercepted_click_is_retried_once(self):
+        bell = _Element(intercepted=1)
+        elements = PageElements(_Driver({"bell": [bell]}), _registry(clickable=True))
+        elements.click("bell")
+        self.assertEqual(bell.clicks, 1)
+
+    def test_click_that_stays_intercepted_is_a_miss(self):
+        elements = PageElements(_Driver({"bell": [_Element(intercepted=2)]}), _registry(clickable=True))
+        with self.assertRaises(TimeoutException):
+            elements.click("bell")
+        self.assertNotIn("bell", elements.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import time
+import unittest
+import traces
+from clock import RealClock
+
+
+class _Server:
+    def __init__(self):
+        self.injected = []
+
+    def inject_message(self, bot, peer, text):
+        self.injected.append((time.monotonic(), bot, peer, text))
+
+
+class TraceReplayerTest(unittest.TestCase):
+    def test_messages_replay_at_arrival_time(self):
+        # Both messages arrived together but were read a second apart
+        events = [
+            {"t": 0.5, "bot": "Arjun", "ev": "message", "peer": "a", "id": 1, "text": "first", "arrived": 0.0},
+            {"t": 1.5, "bot": "Arjun", "ev": "message", "peer": "b", "id": 1, "text": "second", "arrived": 0.0},
+        ]
+        server = _Server()
+        replayer = traces.TraceReplayer(server, events, speed=1.0).start()
+        replayer.thread.join(5)
+        self.assertEqual([entry[3] for entry in server.injected], ["first", "second"])
+        self.assertLess(server.injected[1][0] - server.injected[0][0], 0.5)
+
+    def test_order_follows_arrival_not_read_time(self):
+        events = [
+            {"t": 2.0, "bot": "Arjun", "ev": "message", "peer": "a", "id": 1, "text": "late read", "arrived": 0.1},
+            {"t": 1.0, "bot": "Arjun", "ev": "message", "peer": "b", "id": 1, "text": "early read", "arrived": 0.2},
+        ]
+        replayer = traces.TraceReplayer(_Server(), events, speed=None)
+        self.assertEqual([e["text"] for e in replayer.messages], ["late read", "early read"])
+
+    def test_traces_without_arrival_use_read_time(self):
+        events = [
+            {"t": 2.0, "bot": "Arjun", "ev": "message", "peer": "a", "id": 1, "text": "second"},
+            {"t": 1.0, "bot": "Arjun", "ev": "message", "peer": "b", "id": 1, "text": "first"},
+        ]
+        replayer = traces.TraceReplayer(_Server(), events, speed=None)
+        self.assertEqual([e["text"] for e in replayer.messages], ["first", "second"])
+
+    def test_recorded_arrival_is_relative_to_trace_start(self):
+        clock = RealClock()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.jsonl")
+            recorder = traces.TraceRecorder(path, clock)
+            recorder.record_message("Arjun", "a", 1, "hi", recorder.started + 2.5)
+            recorder.close()
+            _, events = traces.load(path)
+        self.assertEqual(events[0]["arrived"], 2.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
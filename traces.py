@@ -0,0 +1,203 @@
+import argparse
+import atexit
+import gzip
+import json
+import threading
+import time
+
+# Trace format: JSON lines (gzip-compressed when the path ends in .gz). The
+# first line is a header, every other line one bot event:
+#   {"trace": 1, "started": <epoch seconds>, "speed": <clock speed>}
+#   {"t": 1.25, "bot": "Arjun", "ev": "login", "mode": "cold"}
+#   {"t": 9.80, "bot": "Arjun", "ev": "unread", "peers": ["Visitor3"]}
+#   {"t": 10.41, "bot": "Arjun", "ev": "message", "peer": "Visitor3", "id": 17, "text": "hi", "arrived": 9.80}
+#   {"t": 10.97, "bot": "Arjun", "ev": "reply", "peer": "Visitor3", "text": "...", "latency": 1.17}
+# t is seconds of bot clock time since recording started. A message is
+# recorded when the bot reads it; arrived is when it reached the bot (its
+# peer first showing as unread), which is the timing replay reproduces.
+# latency runs from that same moment to the reply being sent.
+FORMAT_VERSION = 1
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class TraceRecorder:
+    """Appends bot events to a trace file; safe to call from every bot thread"""
+
+    def __init__(self, path, clock):
+        self.path = path
+        self.clock = clock
+        self.started = clock.time()
+        self.lock = threading.Lock()
+        self.last_unread = {}
+        self.file = _open(path, "w")
+        self._write({"trace": FORMAT_VERSION, "started": self.started, "speed": clock.speed})
+
+    def _write(self, entry):
+        self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def record(self, bot, event, **fields):
+        entry = {"t": round(self.clock.time() - self.started, 3), "bot": bot, "ev": event}
+        entry.update(fields)
+        with self.lock:
+            if self.file:
+                self._write(entry)
+
+    def record_message(self, bot, peer, message_id, text, arrived):
+        self.record(bot, "message", peer=peer, id=message_id, text=text,
+                    arrived=round(arrived - self.started, 3))
+
+    def record_unread(self, bot, peers):
+        # Every cycle rescans the panel; only changes are worth keeping
+        peers = sorted(peers)
+        if peers and self.last_unread.get(bot) != peers:
+            self.last_unread[bot] = peers
+            self.record(bot, "unread", peers=peers)
+        elif not peers:
+            self.last_unread.pop(bot, None)
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+
+RECORDER = None
+
+
+def start_recording(path, clock):
+    global RECORDER
+    stop_recording()
+    RECORDER = TraceRecorder(path, clock)
+    atexit.register(stop_recording)
+    return RECORDER
+
+
+def stop_recording():
+    global RECORDER
+    if RECORDER:
+        RECORDER.close()
+        RECORDER = None
+
+
+def record(bot, event, **fields):
+    """Record an event if a trace is being recorded; a no-op otherwise"""
+    recorder = RECORDER
+    if recorder:
+        recorder.record(bot, event, **fields)
+
+
+def record_message(bot, peer, message_id, text, arrived):
+    """Record a message read by bot; arrived is the bot clock time it reached the bot"""
+    recorder = RECORDER
+    if recorder:
+        recorder.record_message(bot, peer, message_id, text, arrived)
+
+
+def record_unread(bot, peers):
+    recorder = RECORDER
+    if recorder:
+        recorder.record_unread(bot, peers)
+
+
+def load(path):
+    """(header, events) from a trace file"""
+    with _open(path, "r") as f:
+        header = json.loads(f.readline())
+        if header.get("trace") != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} trace")
+        events = [json.loads(line) for line in f if line.strip()]
+    return header, events
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+def summarize(events):
+    latencies = [e["latency"] for e in events if e["ev"] == "reply" and e.get("latency") is not None]
+    return {
+        "bots": len({e["bot"] for e in events}),
+        "duration": events[-1]["t"] if events else 0,
+        "messages": sum(1 for e in events if e["ev"] == "message"),
+        "replies": len(latencies),
+        "reply_latency_p50": _percentile(latencies, 50),
+        "reply_latency_p95": _percentile(latencies, 95),
+        "reply_latency_max": max(latencies) if latencies else None
+    }
+
+
+class TraceReplayer:
+    """Feeds a trace's incoming messages back into a server at a chosen speed.
+
+    server is anything with inject_message(bot, peer, text), normally a
+    MockChatServer. Messages are injected at the time they arrived, not the
+    later time the recording bot got round to reading them (traces without
+    arrival times fall back to the read time). speed 1 keeps that timing, 10 plays it ten times
+    faster and None injects everything as fast as possible. bot_map renames
+    recorded bots onto the bots of the replaying fleet.
+    """
+
+    def __init__(self, server, events, speed=1.0, bot_map=None):
+        self.server = server
+        self.messages = sorted((e for e in events if e["ev"] == "message"), key=_arrival)
+        self.speed = speed
+        self.bot_map = bot_map or {}
+        self.injected = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="trace-replay", daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        if not self.messages:
+            return
+        origin = _arrival(self.messages[0])
+        started = time.monotonic()
+        for event in self.messages:
+            if self.speed:
+                delay = (_arrival(event) - origin) / self.speed - (time.monotonic() - started)
+                if delay > 0 and self.stop_event.wait(delay):
+                    return
+            elif self.stop_event.is_set():
+                return
+            bot = self.bot_map.get(event["bot"], event["bot"])
+            self.server.inject_message(bot, event["peer"], event["text"])
+            self.injected += 1
+
+    def done(self):
+        return self.thread is not None and not self.thread.is_alive()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+
+def _arrival(event):
+    return event.get("arrived", event["t"])
+
+
+def map_bots(events, bots):
+    """Map recorded bots, in order of first appearance, onto the given bot names"""
+    recorded = list(dict.fromkeys(e["bot"] for e in events))
+    return dict(zip(recorded, bots))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize and compare recorded bot traces")
+    parser.add_argument("traces", nargs="+", help="Trace files; several are summarized side by side")
+    args = parser.parse_args()
+
+    print(json.dumps({path: summarize(load(path)[1]) for path in args.traces}, indent=2))